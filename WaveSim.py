@@ -1,14 +1,15 @@
 import pygame
-import math
-import numpy as np
 import time  # Import the time module for time-related functions
-
-# Pygame Setup
-pygame.init()
+from activity import ActivityMask
+from camera import Camera
+from profiler import Profiler
+from renderer import PointRenderer, brightness_colors
+from simulator import WaveSimulator
+from snapshot_store import AsyncSnapshotWriter
+from wave_solver import WaveSolver
+
+# Window size (the pygame window itself is only opened when run as a script)
 WIDTH, HEIGHT = 800, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("3D Wave Propagation Simulator")
-clock = pygame.time.Clock()
 
 # Physical Constants
 GRID_SIZE = 18  # Grid size (increased for higher resolution)
@@ -16,36 +17,39 @@ SPACING = 30  # Spacing between dots
 FOV = 600
 DEFAULT_FREQS = [0, 0, 0]  # Default frequencies
 
-# Camera Position
-camera_x, camera_y, camera_z = 0, 0, -500
-camera_angle_x, camera_angle_y = 0, 0
-
-# 3D Points for Cube
-cube_points = []
-for x in range(GRID_SIZE):
-    for y in range(GRID_SIZE):
-        for z in range(GRID_SIZE):
-            cube_points.append(((x - GRID_SIZE // 2) * SPACING, 
-                                (y - GRID_SIZE // 2) * SPACING, 
-                                (z - GRID_SIZE // 2) * SPACING))
-
-def project_3d_to_2d(x, y, z):
-    """ Converts 3D coordinates to 2D for rendering. """
-    scale = FOV / (FOV + z - camera_z)
-    px = int(WIDTH // 2 + (x - camera_x) * scale)
-    py = int(HEIGHT // 2 - (y - camera_y) * scale)
-    return px, py
+# Camera position, angles and projection
+camera = Camera(0, 0, -500, fov=FOV, width=WIDTH, height=HEIGHT)
+
+# Headless simulator; the waves propagate outward from the camera
+sim = WaveSimulator(GRID_SIZE, SPACING, DEFAULT_FREQS, origin=camera.position)
+
+# Finite-difference wave equation as an alternative to the analytic sinusoids: point
+# sources at DEFAULT_FREQS interfere, reflect and damp (c in lattice cells per second)
+USE_WAVE_SOLVER = False
+solver = WaveSolver(GRID_SIZE, dt=sim.dt, c=20, damping=0.5, boundary="absorbing")
+solver.set_frequencies(DEFAULT_FREQS)
+
+# 3D Points for Cube, held as one (N, 3) array
+cube_points = sim.points
+
+# Batched dot renderer, draws every point of a frame at once
+renderer = PointRenderer(WIDTH, HEIGHT, radius=3)
+
+# Block activity of the field: regions that did not change are neither redrawn nor
+# sent to the display
+activity = ActivityMask(GRID_SIZE)
+
+# Per-stage timings with an on-screen HUD (F3 toggles; starts on with WAVE_PROFILE=1)
+profiler = Profiler()
+profile_trace_filename = "profile_trace.json"
 
 # Generate wave propagation intensity based on frequency and distance
-def get_wave_intensity(x, y, z, sim_time, frequencies):
-    """ Calculate wave intensity at a point in space and time. """
-    intensity = 0
-    for freq in frequencies:
-        # Sinusoidal wave function with respect to time and distance from the camera
-        distance = math.sqrt((x - camera_x)**2 + (y - camera_y)**2 + (z - camera_z)**2)
-        wave = np.sin(2 * np.pi * freq * (sim_time - distance / (1 + freq * 0.01)))
-        intensity += wave
-    return intensity
+def get_wave_intensities():
+    """ Calculate wave intensity at every point in space at the current sim_time. """
+    if USE_WAVE_SOLVER:
+        return solver.field.ravel()
+    sim.set_origin(camera.position)
+    return sim.field()
 
 # Start with no sound, just the dynamic visual representation
 running = True
@@ -53,118 +57,156 @@ in_input_mode = False
 user_input = ""
 selected_frequency_index = None
 
-# Time control for smooth wave animation
-sim_time = 0  # Renamed the simulation time variable
-
 # Snapshots
 snapshot_start_time = None
 snapshot_counter = 0
-snapshot_interval = 1  # seconds
-snapshot_filename = "cube_snapshots.txt"
-
-# Function to save the state to a text file
-def save_snapshot():
-    with open(snapshot_filename, 'a') as file:
-        file.write(f"Snapshot {snapshot_counter} at time {sim_time}:\n")
-        for point in cube_points:
-            x, y, z = point
-            # Calculate wave intensity
-            wave_intensity = get_wave_intensity(x, y, z, sim_time, DEFAULT_FREQS)
-            # Save the point and its intensity
-            file.write(f"Point: ({x}, {y}, {z}), Intensity: {wave_intensity}\n")
-        file.write("\n")
-
-while running:
-    clock.tick(60)  # Control loop speed to allow for smoother visuals
-    screen.fill((0, 0, 0))  # Clear screen
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        # Start input mode when the "" key is pressed 
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_BACKQUOTE:  # "" key for input mode
-                in_input_mode = True
-                user_input = ""  # Clear the input string
-                selected_frequency_index = None  # Reset frequency index selection
-
-            elif in_input_mode:
-                if selected_frequency_index is None:
-                    # If no frequency index selected, prompt for one
-                    if event.key in [pygame.K_0, pygame.K_1, pygame.K_2]:
-                        selected_frequency_index = int(event.unicode)  # Set the selected frequency index
-                        user_input = ""  # Clear user input for the frequency value
-                elif event.key == pygame.K_RETURN:
-                    # Update the selected frequency when the user presses Enter
-                    try:
-                        new_freq = float(user_input)
-                        DEFAULT_FREQS[selected_frequency_index] = new_freq  # Update the selected frequency
-                    except ValueError:
-                        pass  # If invalid input, just ignore
-                    in_input_mode = False  # Exit input mode
-                elif event.key == pygame.K_BACKSPACE:
-                    user_input = user_input[:-1]  # Delete last character
-                else:
-                    user_input += event.unicode  # Add character to input string
-
-            # Trigger snapshot saving when "p" is pressed
-            if event.key == pygame.K_p:
-                snapshot_start_time = time.time()  # Record the start time of the snapshots
-                snapshot_counter = 0  # Reset snapshot counter
-                # Clear the previous file content
-                with open(snapshot_filename, 'w') as file:
-                    file.write("Cube Snapshots:\n\n")
-
-    # Camera Controls
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_LEFT]: camera_angle_y -= 0.05
-    if keys[pygame.K_RIGHT]: camera_angle_y += 0.05
-    if keys[pygame.K_UP]: camera_angle_x -= 0.05
-    if keys[pygame.K_DOWN]: camera_angle_x += 0.05
-    if keys[pygame.K_w]: camera_z += 20
-    if keys[pygame.K_s]: camera_z -= 20
-    if keys[pygame.K_a]: camera_x -= 20
-    if keys[pygame.K_d]: camera_x += 20
-
-    # Update time for smooth wave animation
-    sim_time += 0.02
-
-    # Save snapshot every second for 30 seconds when triggered
-    if snapshot_start_time is not None:
-        elapsed_time = time.time() - snapshot_start_time
-        if elapsed_time >= snapshot_interval * snapshot_counter and snapshot_counter < 30:
-            save_snapshot()  # Save the current state
-            snapshot_counter += 1  # Increment the snapshot counter
-
-    # Draw dots with increased density
-    for point in cube_points:
-        x, y, z = point
-        px, py = project_3d_to_2d(x, y, z)
-        
-        # Calculate wave intensity based on time and position
-        wave_intensity = get_wave_intensity(x, y, z, sim_time, DEFAULT_FREQS)
-        
-        # Map wave intensity to brightness
-        brightness = int(127 + 128 * wave_intensity)
-        
-        # Ensure brightness stays within the valid range [0, 255]
-        brightness = max(0, min(255, brightness))
-        
-        # Color with the adjusted brightness
-        color = (brightness, brightness, 255)
-
-        pygame.draw.circle(screen, color, (px, py), 3)  # Increase the size of dots for more visibility
-
-    # Display input prompt if in input mode
-    if in_input_mode:
-        font = pygame.font.SysFont('Arial', 24)
-        if selected_frequency_index is None:
-            input_text = font.render("Select Frequency (0, 1, 2):", True, (255, 255, 255))
-        else:
-            input_text = font.render(f"Enter Frequency for {selected_frequency_index}: {user_input}", True, (255, 255, 255))
-        screen.blit(input_text, (10, HEIGHT - 40))
-
-    pygame.display.flip()
-
-pygame.quit()
\ No newline at end of file
+snapshot_interval = 1  # seconds; anything down to one snapshot per frame works
+snapshot_duration = 30  # seconds of capture after "p" is pressed
+snapshot_queue_size = 256  # Snapshots buffered in memory while the disk catches up
+snapshot_filename = "cube_snapshots.snap"
+snapshot_writer = None
+
+# Function to hand the current state to the background snapshot writer
+def save_snapshot(intensities):
+    snapshot_writer.capture(sim.sim_time, intensities)
+
+def stop_snapshots():
+    """ Flush queued snapshots to disk and report any that were dropped. """
+    global snapshot_writer, snapshot_start_time
+    snapshot_writer.close()
+    if snapshot_writer.dropped:
+        print(f"Snapshots: {snapshot_writer.written} written, {snapshot_writer.dropped} dropped (disk too slow)")
+    snapshot_writer = None
+    snapshot_start_time = None
+
+if __name__ == "__main__":
+    # Pygame Setup
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("3D Wave Propagation Simulator")
+    clock = pygame.time.Clock()
+    last_view = None  # Camera pose of the last projection
+    last_overlay = False  # Whether text was drawn over the last frame
+
+    while running:
+        clock.tick(60)  # Control loop speed to allow for smoother visuals
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+
+            # Start input mode when the "" key is pressed
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_BACKQUOTE:  # "" key for input mode
+                    in_input_mode = True
+                    user_input = ""  # Clear the input string
+                    selected_frequency_index = None  # Reset frequency index selection
+
+                elif in_input_mode:
+                    if selected_frequency_index is None:
+                        # If no frequency index selected, prompt for one
+                        if event.key in [pygame.K_0, pygame.K_1, pygame.K_2]:
+                            selected_frequency_index = int(event.unicode)  # Set the selected frequency index
+                            user_input = ""  # Clear user input for the frequency value
+                    elif event.key == pygame.K_RETURN:
+                        # Update the selected frequency when the user presses Enter
+                        try:
+                            new_freq = float(user_input)
+                            sim.set_frequency(selected_frequency_index, new_freq)  # Update the selected frequency
+                            solver.set_frequencies(sim.frequencies)
+                        except ValueError:
+                            pass  # If invalid input, just ignore
+                        in_input_mode = False  # Exit input mode
+                    elif event.key == pygame.K_BACKSPACE:
+                        user_input = user_input[:-1]  # Delete last character
+                    else:
+                        user_input += event.unicode  # Add character to input string
+
+                # Trigger snapshot saving when "p" is pressed
+                if event.key == pygame.K_p:
+                    # Start a new snapshot file, replacing the previous one
+                    if snapshot_writer is not None:
+                        stop_snapshots()
+                    snapshot_start_time = time.time()  # Record the start time of the snapshots
+                    snapshot_counter = 0  # Reset snapshot counter
+                    snapshot_writer = AsyncSnapshotWriter(snapshot_filename, cube_points,
+                                                          max_queue=snapshot_queue_size)
+
+        # Camera Controls
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT]: camera.angle_y -= 0.05
+        if keys[pygame.K_RIGHT]: camera.angle_y += 0.05
+        if keys[pygame.K_UP]: camera.angle_x -= 0.05
+        if keys[pygame.K_DOWN]: camera.angle_x += 0.05
+        if keys[pygame.K_w]: camera.z += 20
+        if keys[pygame.K_s]: camera.z -= 20
+        if keys[pygame.K_a]: camera.x -= 20
+        if keys[pygame.K_d]: camera.x += 20
+
+        # Update time for smooth wave animation
+        with profiler.span("simulate"):
+            sim.step()
+            if USE_WAVE_SOLVER:
+                solver.step()
+
+        # Calculate wave intensity for every point based on time and position
+        with profiler.span("field"):
+            wave_intensity = get_wave_intensities()
+
+        # Save a snapshot every snapshot_interval for snapshot_duration when triggered
+        if snapshot_start_time is not None:
+            with profiler.span("snapshot"):
+                elapsed_time = time.time() - snapshot_start_time
+                if elapsed_time >= snapshot_duration:
+                    stop_snapshots()
+                elif elapsed_time >= snapshot_interval * snapshot_counter:
+                    save_snapshot(wave_intensity)  # Queue the current state
+                    # Skip slots missed between frames instead of bursting to catch up
+                    snapshot_counter = int(elapsed_time // snapshot_interval) + 1
+
+        # Rotate and project every point at once, culling those behind the camera or off screen;
+        # a still camera keeps the last projection
+        view = (camera.x, camera.y, camera.z, camera.angle_x, camera.angle_y)
+        redraw_all = view != last_view or last_overlay
+        if view != last_view:
+            with profiler.span("project"):
+                screen_points, depth, visible = camera.project(cube_points, margin=3)
+            last_view = view
+
+        # Map wave intensity to brightness and draw every dot in one batch, nearest on top
+        # (only around the blocks that changed, unless the whole frame is stale)
+        with profiler.span("draw"):
+            changed = activity.nodes(activity.changed(wave_intensity))
+            colors = brightness_colors(wave_intensity)
+            if redraw_all:
+                renderer.draw(screen, screen_points, depth, colors, visible)
+                dirty = None
+            else:
+                dirty = renderer.update(screen, screen_points, depth, colors, visible, changed)
+
+        # Display input prompt if in input mode
+        if in_input_mode:
+            font = pygame.font.SysFont('Arial', 24)
+            if selected_frequency_index is None:
+                input_text = font.render("Select Frequency (0, 1, 2):", True, (255, 255, 255))
+            else:
+                input_text = font.render(f"Enter Frequency for {selected_frequency_index}: {user_input}", True, (255, 255, 255))
+            screen.blit(input_text, (10, HEIGHT - 40))
+
+        profiler.draw_hud(screen)
+        last_overlay = in_input_mode or profiler.enabled
+        with profiler.span("flip"):
+            if dirty is None or last_overlay:
+                pygame.display.flip()
+            elif dirty:
+                pygame.display.update(dirty)
+        profiler.frame()
+
+    if snapshot_writer is not None:
+        stop_snapshots()
+    if profiler.events:
+        count = profiler.export_chrome_trace(profile_trace_filename)
+        print(f"Wrote {count} profiling spans to {profile_trace_filename}")
+    pygame.quit()
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Block-level activity tracking over the GRID_SIZE³ lattice. The lattice is cut
+# into block³ cells and each cell is summarized by its largest magnitude (or
+# largest change since the last frame). Cells below the threshold are
+# quiescent: the reservoir skips their rows and the viewers skip redrawing the
+# screen area they cover, so the per-frame cost follows the activity instead of
+# GRID_SIZE³. Node order is x-major, as in make_lattice / cube_points.
+
+ACTIVITY_BLOCK = 6
+ACTIVITY_THRESHOLD = 1e-3
+
+
+def block_max(values, grid_size, block=ACTIVITY_BLOCK):
+    """Largest |value| in every block³ cell of an (N,) lattice array, as (nb, nb, nb)."""
+    cells = np.abs(np.asarray(values).reshape((grid_size,) * 3))
+    starts = np.arange(0, grid_size, block)
+    for axis in range(3):
+        cells = np.maximum.reduceat(cells, starts, axis=axis)
+    return cells
+
+
+def dilate(mask):
+    """Grow a 3D block mask by one block towards each face neighbour."""
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    grown[:, 1:] |= mask[:, :-1]
+    grown[:, :-1] |= mask[:, 1:]
+    grown[:, :, 1:] |= mask[:, :, :-1]
+    grown[:, :, :-1] |= mask[:, :, 1:]
+    return grown
+
+
+class ActivityMask:
+    """Per-block activity and change masks for values laid out on the lattice."""
+
+    def __init__(self, grid_size, block=ACTIVITY_BLOCK, threshold=ACTIVITY_THRESHOLD):
+        self.grid_size = grid_size
+        self.block = block
+        self.threshold = threshold
+        cells = -(-grid_size // block)
+        self.shape = (cells,) * 3
+        i = np.arange(grid_size) // block
+        self.block_index = ((i[:, None, None] * cells + i[None, :, None]) * cells + i[None, None, :]).ravel()
+        self._previous = None
+
+    def active(self, values):
+        """Blocks holding any |value| above the threshold."""
+        return block_max(values, self.grid_size, self.block) > self.threshold
+
+    def changed(self, values):
+        """Blocks whose values moved by more than the threshold since the last call (all, the first time)."""
+        if self._previous is None:
+            self._previous = np.array(values, dtype=np.float32)
+            return np.ones(self.shape, dtype=bool)
+        mask = block_max(values - self._previous, self.grid_size, self.block) > self.threshold
+        # Only remember changed blocks, so slow drifts still add up past the threshold
+        nodes = self.nodes(mask)
+        self._previous[nodes] = values[nodes]
+        return mask
+
+    def reset(self):
+        self._previous = None
+
+    def nodes(self, mask):
+        """Per-node boolean mask from a per-block one."""
+        return mask.ravel()[self.block_index]
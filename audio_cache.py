@@ -0,0 +1,202 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# On-disk cache of encoded audio grids. Each entry is a (T, G, G) float32 .npy
+# file keyed by the audio file's content hash, the sample rate, the grid size
+# and the encoding version, and is opened as a memory map so a warm start does no decoding at all.
+# Total size is bounded with least-recently-used eviction (entry mtimes are
+# touched on every hit). A small sidecar maps each audio file's path, size and
+# mtime to its content hash, so a warm start does not re-read the file either.
+
+CACHE_DIR = os.environ.get("WAVE_AUDIO_CACHE",
+                           os.path.join(os.path.expanduser("~"), ".cache", "liquid-neuronetwork", "audio"))
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".aiff", ".aif")
+SAMPLE_RATE = 22050  # Same default as audio_stream.SAMPLE_RATE
+HASH_INDEX = "hashes.json"
+ENCODING_VERSION = 2  # Bump when the grid encoding changes so old entries are not reused
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_file(path, grid_size, sr=SAMPLE_RATE):
+    """Encode a whole file into (T, G, G) grids, scaled exactly as AudioStream.next_grid scales them."""
+    from audio_stream import AudioStream  # Decoding dependencies only load on a cache miss
+
+    with AudioStream(path, grid_size, sr=sr) as stream:
+        frames = []
+        while (frame := stream.next_frame()) is not None:
+            frames.append(frame.copy())
+        reference = stream.reference
+    if not frames:
+        return np.zeros((0, grid_size, grid_size), dtype=np.float32)
+    return np.stack(frames).reshape(-1, grid_size, grid_size) / reference
+
+
+class GridSequence:
+    """Steps through cached grids one simulation step at a time, looping at the end.
+
+    Audio too short for a single frame gives no grids; it then feeds zeros, as
+    an AudioStream does once its file has ended.
+    """
+
+    def __init__(self, grids):
+        self.grids = grids
+        self.position = 0
+
+    def next_grid(self):
+        if not len(self.grids):
+            return np.zeros(self.grids.shape[1:], dtype=np.float32)
+        grid = self.grids[self.position % len(self.grids)]
+        self.position += 1
+        return grid
+
+    def next_grids(self, steps):
+        if not len(self.grids):
+            return np.zeros((steps,) + self.grids.shape[1:], dtype=np.float32)
+        index = np.arange(self.position, self.position + steps) % len(self.grids)
+        self.position += steps
+        return self.grids[index]
+
+    def close(self):
+        pass
+
+
+class AudioCache:
+    """Size-bounded LRU cache of encoded audio grids."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, path, grid_size, sr=SAMPLE_RATE):
+        return os.path.join(self.cache_dir, f"{self.source_hash(path)}_{sr}_{grid_size}_v{ENCODING_VERSION}.npy")
+
+    def source_hash(self, path):
+        """Content hash of an audio file, reused while its size and mtime are unchanged."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        index_path = os.path.join(self.cache_dir, HASH_INDEX)
+        try:
+            with open(index_path) as file:
+                hashes = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            hashes = {}
+        known = hashes.get(key)
+        if known is not None and known[:2] == stamp:
+            return known[2]
+
+        digest = file_hash(path)
+        # Forget files that no longer exist so the sidecar stays small
+        hashes = {k: v for k, v in hashes.items() if os.path.exists(k)}
+        hashes[key] = stamp + [digest]
+        tmp = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as file:
+            json.dump(hashes, file)
+        os.replace(tmp, index_path)
+        return digest
+
+    def get(self, path, grid_size, sr=SAMPLE_RATE):
+        """Memory-mapped grids for the file, encoding and storing them on a miss."""
+        entry = self.entry_path(path, grid_size, sr)
+        try:
+            grids = np.load(entry, mmap_mode="r")
+            os.utime(entry)  # Mark as recently used
+            return grids
+        except (FileNotFoundError, ValueError):
+            pass
+
+        grids = encode_file(path, grid_size, sr).astype(np.float32)
+        # Write to a temporary name first so readers never see a partial entry
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as file:
+            np.save(file, grids)
+        os.replace(tmp, entry)
+        self.evict(keep=entry)
+        return np.load(entry, mmap_mode="r")
+
+    def open(self, path, grid_size, sr=SAMPLE_RATE):
+        """A GridSequence over the cached grids, for feeding one grid per step."""
+        return GridSequence(self.get(path, grid_size, sr))
+
+    def entries(self):
+        """(mtime, size, path) of every entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npy"):
+                full = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(full)
+                except FileNotFoundError:
+                    continue  # Evicted by another process since listdir
+                entries.append((stat.st_mtime, stat.st_size, full))
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, full in entries:
+            if total <= self.max_bytes:
+                break
+            if full == keep:
+                continue
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                pass  # Another process evicted it first
+            total -= size
+
+    def prewarm(self, directory, grid_size, sr=SAMPLE_RATE):
+        """Encode every audio file under a directory; returns the number of files."""
+        count = 0
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    full = os.path.join(root, name)
+                    grids = self.get(full, grid_size, sr)
+                    print(f"{full}: {len(grids)} frames")
+                    count += 1
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the encoded audio cache.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--max-bytes", type=int, default=MAX_CACHE_BYTES)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prewarm = commands.add_parser("prewarm", help="Encode every audio file in a directory")
+    prewarm.add_argument("directory")
+    prewarm.add_argument("--grid-size", type=int, default=10)
+    prewarm.add_argument("--sr", type=int, default=SAMPLE_RATE)
+
+    commands.add_parser("info", help="Show cache entries and total size")
+    args = parser.parse_args()
+
+    cache = AudioCache(args.cache_dir, args.max_bytes)
+    if args.command == "prewarm":
+        count = cache.prewarm(args.directory, args.grid_size, args.sr)
+        print(f"Prewarmed {count} files into {cache.cache_dir}")
+    else:
+        entries = cache.entries()
+        for _, size, full in entries:
+            print(f"{size:>12}  {os.path.basename(full)}")
+        print(f"{len(entries)} entries, {sum(size for _, size, _ in entries)} bytes")
+
+
+if __name__ == "__main__":
+    main()
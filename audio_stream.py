@@ -0,0 +1,113 @@
+import numpy as np
+import soundfile as sf
+
+# Streaming audio encoder. The file is read in fixed-size blocks, resampled
+# incrementally, and cut into STFT frames on demand; magnitude frames go into a
+# fixed-size spectrogram ring buffer. Each simulation step takes one frame as a
+# (GRID_SIZE, GRID_SIZE) input grid, so memory stays bounded however long the
+# recording is and the first grid is ready after reading a single block.
+# Grids are scaled by a fixed reference level (a full-scale sine peaks at 1.0)
+# rather than by the loudest frame so far, so a frame's scale never depends on
+# what came before it and audio_cache encodes exactly the same grids.
+
+SAMPLE_RATE = 22050
+BLOCK_SIZE = 8192  # Samples read from disk per block
+
+
+def fft_size(grid_size):
+    """STFT size whose rfft has exactly grid_size**2 bins."""
+    return 2 * (grid_size ** 2 - 1)
+
+
+def reference_level(n_fft):
+    """Peak STFT magnitude of a full-scale sine under the periodic Hann window."""
+    return n_fft / 4
+
+
+class AudioStream:
+    """Chunked audio reader producing one normalized (G, G) spectrogram grid per step."""
+
+    def __init__(self, path, grid_size, sr=SAMPLE_RATE, hop_length=None, history=256, loop=False):
+        self.path = path
+        self.grid_size = grid_size
+        self.n_fft = fft_size(grid_size)
+        self.hop_length = hop_length or self.n_fft // 4
+        self.window = np.hanning(self.n_fft + 1)[:-1].astype(np.float32)  # Periodic Hann
+        self.reference = reference_level(self.n_fft)  # Magnitude that maps to 1.0
+
+        # Spectrogram ring buffer: the most recent `history` magnitude frames
+        self.ring = np.zeros((history, grid_size ** 2), dtype=np.float32)
+        self.frames = 0  # Frames produced so far (the next one goes to frames % history)
+
+        self._file = sf.SoundFile(path)
+        self.loop = loop and self._file.frames > 0
+        self.native_sr = self._file.samplerate
+        self.sr = sr or self.native_sr
+        self._resampler = None
+        if self.sr != self.native_sr:
+            import soxr  # Only needed when the file's rate differs
+            self._resampler = soxr.ResampleStream(self.native_sr, self.sr, 1, dtype="float32")
+
+        # Carry-over samples not yet consumed by a full frame
+        self._samples = np.zeros(0, dtype=np.float32)
+        self._eof = False
+
+    def _read_block(self):
+        """Read, downmix and resample the next block; False once the file is exhausted."""
+        if self._eof:
+            return False
+        block = self._file.read(BLOCK_SIZE, dtype="float32", always_2d=True)
+        last = len(block) < BLOCK_SIZE
+        mono = block.mean(axis=1)
+        if self._resampler is not None:
+            # When looping the resampler runs on seamlessly across the wrap
+            mono = self._resampler.resample_chunk(mono, last=last and not self.loop)
+        self._samples = np.concatenate([self._samples, mono])
+        if last:
+            if self.loop:
+                self._file.seek(0)
+            else:
+                self._eof = True
+        return len(mono) > 0 or not self._eof
+
+    def next_frame(self):
+        """Compute the next STFT magnitude frame into the ring buffer; None at end of file."""
+        while len(self._samples) < self.n_fft:
+            if not self._read_block():
+                # Samples already covered by the previous frame don't need another one
+                covered = self.n_fft - self.hop_length if self.frames else 0
+                if len(self._samples) <= covered:
+                    return None
+                # Zero-pad the tail of the file into one final frame
+                self._samples = np.pad(self._samples, (0, self.n_fft - len(self._samples)))
+        frame = self.ring[self.frames % len(self.ring)]
+        frame[:] = np.abs(np.fft.rfft(self._samples[:self.n_fft] * self.window))
+        self._samples = self._samples[self.hop_length:]
+        self.frames += 1
+        return frame
+
+    def next_grid(self):
+        """Next input grid for one simulation step; zeros once the audio has ended."""
+        frame = self.next_frame()
+        if frame is None:
+            return np.zeros((self.grid_size, self.grid_size), dtype=np.float32)
+        return frame.reshape(self.grid_size, self.grid_size) / self.reference
+
+    def next_grids(self, steps):
+        """(steps, G, G) stack of input grids for a batch of simulation steps."""
+        return np.stack([self.next_grid() for _ in range(steps)])
+
+    def recent(self, count=None):
+        """The most recent frames in the ring buffer, oldest first."""
+        count = min(count or len(self.ring), self.frames, len(self.ring))
+        index = np.arange(self.frames - count, self.frames) % len(self.ring)
+        return self.ring[index]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,242 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Headless benchmark suite for the simulator, renderer, snapshot and training
+# paths. Every benchmark builds its inputs once from fixed seeds and times one
+# operation repeatedly; the per-grid ones run at each GRID_SIZE. Results are
+# written as JSON and can be compared against a stored baseline run, failing
+# (exit status 1) when a median slows down by more than the threshold:
+#
+#     python benchmark.py --out baseline.json
+#     python benchmark.py --baseline baseline.json
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Offscreen surfaces need no window
+
+GRID_SIZES = [10, 18, 32, 64, 128]
+SPACING = 30
+FREQS = [1.0, 2.0, 3.0]
+WIDTH, HEIGHT = 800, 800
+SNAPSHOT_FRAMES = 8
+FIT_SAMPLES = 100
+FIT_MAX_VALUES = 10_000_000  # Largest (samples x points) feature matrix the fit benchmark builds
+STORE_ENTRIES = 10_000
+THRESHOLD = 0.2
+
+
+def measure(fn, min_time=0.2, min_repeats=3, max_repeats=1000):
+    """Call fn after one warm-up until min_time has passed; per-call timing stats in seconds."""
+    fn()
+    timings = []
+    total = 0.0
+    while (total < min_time or len(timings) < min_repeats) and len(timings) < max_repeats:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        total += elapsed
+    timings = np.array(timings)
+    return {"median": float(np.median(timings)), "min": float(timings.min()),
+            "mean": float(timings.mean()), "repeats": len(timings)}
+
+
+def bench_field(grid_size, workdir):
+    """WaveSimulator.field: the per-frame intensity computation."""
+    from simulator import WaveSimulator
+
+    sim = WaveSimulator(grid_size, SPACING, FREQS, origin=(0, 0, -500))
+    sim.external_input = np.random.default_rng(0).random((grid_size, grid_size))
+
+    def run():
+        sim.step()
+        sim.field()
+    return run
+
+
+def bench_projection(grid_size, workdir):
+    """Camera.project of the whole lattice."""
+    from camera import Camera
+    from wave_field import make_lattice
+
+    camera = Camera(0, 0, -500, angle_x=0.3, angle_y=0.4, width=WIDTH, height=HEIGHT)
+    points = make_lattice(grid_size, SPACING)
+    return lambda: camera.project(points, margin=3)
+
+
+def bench_render(grid_size, workdir):
+    """PointRenderer.draw of the projected lattice onto an offscreen surface."""
+    import pygame
+    from camera import Camera
+    from renderer import PointRenderer, brightness_colors
+    from wave_field import make_lattice
+
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    renderer = PointRenderer(WIDTH, HEIGHT, radius=3 if grid_size <= 32 else 1)
+    camera = Camera(0, 0, -500, angle_x=0.3, angle_y=0.4, width=WIDTH, height=HEIGHT)
+    screen_points, depth, visible = camera.project(make_lattice(grid_size, SPACING), margin=3)
+    colors = brightness_colors(np.random.default_rng(0).uniform(-1, 1, len(depth)))
+    return lambda: renderer.draw(surface, screen_points, depth, colors, visible)
+
+
+def bench_snapshot_save(grid_size, workdir):
+    """SnapshotWriter.write_many of SNAPSHOT_FRAMES frames to a fresh file."""
+    from snapshot_store import SnapshotWriter
+    from wave_field import make_lattice
+
+    points = make_lattice(grid_size, SPACING)
+    times = np.arange(SNAPSHOT_FRAMES, dtype=np.float64)
+    frames = np.random.default_rng(0).random((SNAPSHOT_FRAMES, len(points)), dtype=np.float32)
+    filename = os.path.join(workdir, f"save_{grid_size}.snap")
+
+    def run():
+        with SnapshotWriter(filename, points) as writer:
+            writer.write_many(times, frames)
+    return run
+
+
+def bench_snapshot_load(grid_size, workdir):
+    """load_snapshots plus reading every frame of a SNAPSHOT_FRAMES file."""
+    from snapshot_store import SnapshotWriter, load_snapshots
+    from wave_field import make_lattice
+
+    points = make_lattice(grid_size, SPACING)
+    filename = os.path.join(workdir, f"load_{grid_size}.snap")
+    with SnapshotWriter(filename, points) as writer:
+        writer.write_many(np.arange(SNAPSHOT_FRAMES, dtype=np.float64),
+                          np.random.default_rng(0).random((SNAPSHOT_FRAMES, len(points)), dtype=np.float32))
+
+    def run():
+        snapshots = load_snapshots(filename)
+        for _, intensities in snapshots:
+            intensities.sum()
+    return run
+
+
+def bench_features_fit(grid_size, workdir):
+    """ws.py's training path: batched features, reservoir run and readout fit."""
+    if FIT_SAMPLES * grid_size ** 3 > FIT_MAX_VALUES:
+        return None
+    from sklearn.linear_model import LogisticRegression
+    from reservoir import Reservoir
+    from simulator import WaveSimulator
+
+    rng = np.random.default_rng(0)
+    sim = WaveSimulator(grid_size, SPACING, FREQS)
+    grids = rng.random((FIT_SAMPLES, grid_size, grid_size))
+    labels = rng.integers(0, 2, FIT_SAMPLES)
+    times = sim.dt * np.arange(FIT_SAMPLES)
+
+    def run():
+        reservoir = Reservoir(grid_size, seed=0)
+        features = reservoir.run(sim.wave_field.compute_many(times, sim.frequencies, grids))
+        LogisticRegression(max_iter=1000).fit(features, labels)
+    return run
+
+
+def bench_store_lookup(grid_size, workdir):
+    """TrainingStore exact and fuzzy lookups over STORE_ENTRIES prompts."""
+    from lookup_index import NgramIndex, lookup_response
+    from training_store import TrainingStore
+
+    store = TrainingStore(os.path.join(workdir, "store.db"))
+    if len(store) == 0:
+        store.learn_many((f"question number {i}", f"answer {i}") for i in range(STORE_ENTRIES))
+    index = NgramIndex(prompt for prompt, _, _ in store.items())
+    queries = [f"question number {i}" for i in range(0, STORE_ENTRIES, 97)]
+    queries += [f"questoin numbr {i}" for i in range(0, STORE_ENTRIES, 97)]
+
+    def run():
+        for query in queries:
+            lookup_response(store, index, query)
+    return run
+
+
+# name -> (setup function, runs once per grid size)
+BENCHMARKS = {
+    "field": (bench_field, True),
+    "projection": (bench_projection, True),
+    "render": (bench_render, True),
+    "snapshot_save": (bench_snapshot_save, True),
+    "snapshot_load": (bench_snapshot_load, True),
+    "features_fit": (bench_features_fit, True),
+    "store_lookup": (bench_store_lookup, False),
+}
+
+
+def run_benchmarks(names=None, grid_sizes=GRID_SIZES, min_time=0.2):
+    """Run the selected benchmarks and return their result rows."""
+    import pygame
+    pygame.init()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names or BENCHMARKS:
+            setup, per_grid = BENCHMARKS[name]
+            for grid_size in grid_sizes if per_grid else [None]:
+                fn = setup(grid_size, workdir)
+                row = {"name": name, "grid_size": grid_size}
+                if fn is None:
+                    row["skipped"] = True
+                else:
+                    row.update(measure(fn, min_time))
+                results.append(row)
+                label = name if grid_size is None else f"{name}[{grid_size}]"
+                timing = "skipped" if fn is None else f"{row['median'] * 1000:10.3f} ms"
+                print(f"{label:<24}{timing}")
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(), "time": time.time()}
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Rows slower than the baseline median by more than threshold, as (name, grid_size, ratio)."""
+    previous = {(row["name"], row["grid_size"]): row for row in baseline["results"] if "median" in row}
+    regressions = []
+    for row in results:
+        base = previous.get((row["name"], row["grid_size"]))
+        if base is None or "median" not in row:
+            continue
+        ratio = row["median"] / base["median"]
+        row["baseline_ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((row["name"], row["grid_size"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulator, renderer and training paths.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run")
+    parser.add_argument("--grid-sizes", type=int, nargs="+", default=GRID_SIZES)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds of timing per benchmark")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, args.grid_sizes, args.min_time)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for name, grid_size, ratio in regressions:
+            print(f"REGRESSION {name}[{grid_size}]: {ratio:.2f}x baseline")
+        if not regressions:
+            print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import numpy as np
+
+# Camera and batched projection: one rotation matrix per frame and a single
+# vectorized pass that maps the whole (N, 3) point array to screen pixels.
+
+LIMIT = 2 ** 30  # Projected coordinates are clamped to this before the int cast
+
+
+class Camera:
+    """Perspective camera with the position/angle controls used by the viewers."""
+
+    def __init__(self, x=0, y=0, z=-500, angle_x=0, angle_y=0, fov=600, width=800, height=800):
+        self.x, self.y, self.z = x, y, z
+        self.angle_x, self.angle_y = angle_x, angle_y
+        self.fov = fov
+        self.width, self.height = width, height
+        self._buffers = None
+
+    @property
+    def position(self):
+        return (self.x, self.y, self.z)
+
+    def rotation_matrix(self):
+        """Rotation about the y axis (angle_y) followed by the x axis (angle_x)."""
+        cy, sy = np.cos(self.angle_y), np.sin(self.angle_y)
+        cx, sx = np.cos(self.angle_x), np.sin(self.angle_x)
+        rot_y = np.array([[cy, 0, -sy],
+                          [0, 1, 0],
+                          [sy, 0, cy]])
+        rot_x = np.array([[1, 0, 0],
+                          [0, cx, -sx],
+                          [0, sx, cx]])
+        return rot_x @ rot_y
+
+    def _get_buffers(self, n):
+        if self._buffers is None or len(self._buffers[1]) != n:
+            self._buffers = (np.empty((n, 3)), np.empty(n), np.empty((n, 2), dtype=np.int32),
+                             np.empty(n, dtype=bool))
+        return self._buffers
+
+    def project(self, points, margin=0):
+        """Project (N, 3) points to screen space.
+
+        Returns (screen, depth, visible): (N, 2) int32 pixel coordinates, the
+        rotated z used for depth ordering, and a mask that is False for points
+        behind the camera or more than `margin` pixels off screen. The arrays
+        are reused between calls with the same N.
+        """
+        rotated, scale, screen, visible = self._get_buffers(len(points))
+        np.matmul(points, self.rotation_matrix().T, out=rotated)
+
+        # Perspective divide; points at or behind the camera plane are culled
+        np.subtract(rotated[:, 2], self.z - self.fov, out=scale)
+        visible[:] = scale > 0
+        np.divide(self.fov, scale, out=scale, where=visible)
+        scale[~visible] = 0
+
+        # int() truncation toward zero, like the old per-point projection;
+        # clipped first so points right at the camera plane can't overflow int32
+        px = np.clip(self.width // 2 + (rotated[:, 0] - self.x) * scale, -LIMIT, LIMIT)
+        py = np.clip(self.height // 2 - (rotated[:, 1] - self.y) * scale, -LIMIT, LIMIT)
+        screen[:, 0] = np.trunc(px)
+        screen[:, 1] = np.trunc(py)
+
+        visible &= (screen[:, 0] >= -margin) & (screen[:, 0] < self.width + margin)
+        visible &= (screen[:, 1] >= -margin) & (screen[:, 1] < self.height + margin)
+        return screen, rotated[:, 2], visible
@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from simulator import WaveSimulator, TIME_STEP
+
+# Parallel ensemble runner. A parameter grid (frequencies, grid size, spacing,
+# audio file) expands into independent headless simulations that run across a
+# process pool. Each finished run is appended to a JSON-lines checkpoint, so an
+# interrupted sweep resumes where it stopped, and the collected results are
+# written as one columnar .npz file (one array per column). A run that raises is
+# logged to the checkpoint as an error row and the sweep carries on; error rows
+# are retried on resume.
+
+CHUNK_STEPS = 256  # Steps sampled at a time, keeping per-run memory bounded
+COLUMNS = ["run_id", "freq_0", "freq_1", "freq_2", "grid_size", "spacing", "audio", "steps",
+           "mean", "std", "rms", "peak", "final_mean", "seconds"]
+
+
+def parameter_grid(frequencies, grid_sizes, spacings, audio_files=(None,)):
+    """Expand the sweep axes into a list of run configurations."""
+    configs = []
+    for freqs, grid_size, spacing, audio in itertools.product(frequencies, grid_sizes, spacings, audio_files):
+        configs.append({"frequencies": [float(f) for f in freqs], "grid_size": int(grid_size),
+                        "spacing": float(spacing), "audio": audio})
+    return configs
+
+
+def run_id(config, steps):
+    """Stable identifier of one run, used to skip finished runs on resume."""
+    key = json.dumps([config, steps], sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def run_simulation(config, steps, dt=TIME_STEP):
+    """Run one headless simulation and return its summary statistics."""
+    if steps <= 0:
+        raise ValueError(f"steps must be positive, got {steps}")
+    start = time.perf_counter()
+    sim = WaveSimulator(config["grid_size"], config["spacing"], config["frequencies"], dt=dt)
+    audio = None
+    if config["audio"]:
+        from audio_cache import AudioCache  # Only runs with audio need the cache
+        audio = AudioCache().open(config["audio"], config["grid_size"])
+
+    total = total_sq = 0.0
+    peak = 0.0
+    buffer = np.empty((CHUNK_STEPS, sim.num_points), dtype=np.float32)
+    done = 0
+    while done < steps:
+        n = min(CHUNK_STEPS, steps - done)
+        if audio is not None:
+            times = sim.sim_time + sim.dt * np.arange(1, n + 1)
+            states = sim.wave_field.compute_many(times, sim.frequencies, audio.next_grids(n), out=buffer[:n])
+            sim.sim_time = float(times[-1])
+        else:
+            states = sim.sample(n, out=buffer[:n])
+        total += float(states.sum(dtype=np.float64))
+        total_sq += float(np.square(states, dtype=np.float64).sum())
+        peak = max(peak, float(np.abs(states).max()))
+        done += n
+
+    count = steps * sim.num_points
+    mean = total / count
+    return {
+        "mean": mean,
+        "std": float(np.sqrt(max(total_sq / count - mean ** 2, 0.0))),
+        "rms": float(np.sqrt(total_sq / count)),
+        "peak": peak,
+        "final_mean": float(states[-1].mean()),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _run(config, steps):
+    return config, run_simulation(config, steps)
+
+
+def load_checkpoint(path):
+    """Results already recorded in a checkpoint file, keyed by run_id."""
+    results = {}
+    if path and os.path.exists(path):
+        with open(path) as file:
+            for line in file:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut off by an interrupted write
+                if "error" in row:
+                    continue  # Failed runs are retried
+                results[row["run_id"]] = row
+    return results
+
+
+def to_row(config, steps, summary):
+    freqs = (config["frequencies"] + [0.0, 0.0, 0.0])[:3]
+    return {"run_id": run_id(config, steps), "freq_0": freqs[0], "freq_1": freqs[1], "freq_2": freqs[2],
+            "grid_size": config["grid_size"], "spacing": config["spacing"], "audio": config["audio"] or "",
+            "steps": steps, **summary}
+
+
+def write_columns(path, rows):
+    """Write the rows as one columnar .npz file."""
+    columns = {name: np.array([row[name] for row in rows]) for name in COLUMNS}
+    np.savez(path, **columns)
+
+
+def run_ensemble(configs, steps, workers=None, checkpoint=None, out=None):
+    """Run every configuration not already in the checkpoint; returns the rows of the successful runs."""
+    results = load_checkpoint(checkpoint)
+    pending = [c for c in configs if run_id(c, steps) not in results]
+    total = len(configs)
+    print(f"{total - len(pending)}/{total} runs already done, {len(pending)} to go")
+
+    start = time.perf_counter()
+    log = open(checkpoint, "a") if checkpoint else None
+    failed = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run, config, steps): config for config in pending}
+            for finished, future in enumerate(as_completed(futures), 1):
+                config = futures[future]
+                try:
+                    _, summary = future.result()
+                except Exception as e:
+                    row = {"run_id": run_id(config, steps), "config": config, "steps": steps,
+                           "error": f"{type(e).__name__}: {e}"}
+                    failed.append(row)
+                    print(f"Run {row['run_id']} failed: {row['error']}")
+                else:
+                    row = to_row(config, steps, summary)
+                    results[row["run_id"]] = row
+                if log:
+                    log.write(json.dumps(row) + "\n")
+                    log.flush()
+                elapsed = time.perf_counter() - start
+                eta = elapsed / finished * (len(pending) - finished)
+                print(f"[{total - len(pending) + finished}/{total}] {elapsed:.1f}s elapsed, ~{eta:.1f}s left")
+    finally:
+        if log:
+            log.close()
+
+    if failed:
+        print(f"{len(failed)} runs failed; they are retried when the sweep is resumed")
+    rows = [results[key] for key in (run_id(c, steps) for c in configs) if key in results]
+    if out:
+        write_columns(out, rows)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a sweep of headless wave simulations in parallel.")
+    parser.add_argument("--freqs", nargs="*", default=[],
+                        help="Frequency triples, e.g. 0,0,0 1,2,3")
+    parser.add_argument("--freq-values", type=float, nargs="*", default=[],
+                        help="Sweep every 3-frequency combination of these values")
+    parser.add_argument("--grid-sizes", type=int, nargs="+", default=[18])
+    parser.add_argument("--spacings", type=float, nargs="+", default=[30])
+    parser.add_argument("--audio", nargs="*", default=[], help="Audio files to drive the runs with")
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", default="ensemble_checkpoint.jsonl")
+    parser.add_argument("--out", default="ensemble_results.npz")
+    args = parser.parse_args()
+    if args.steps <= 0:
+        parser.error("--steps must be positive")
+
+    frequencies = [[float(f) for f in triple.split(",")] for triple in args.freqs]
+    frequencies += [list(combo) for combo in itertools.product(args.freq_values, repeat=3)]
+    if not frequencies:
+        frequencies = [[0.0, 0.0, 0.0]]
+    configs = parameter_grid(frequencies, args.grid_sizes, args.spacings, args.audio or [None])
+    run_ensemble(configs, args.steps, args.workers, args.checkpoint, args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
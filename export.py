@@ -0,0 +1,267 @@
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Headless export of simulation runs and recorded .snap captures to video.
+# Frames are rendered with the same Camera / PointRenderer as the live viewers,
+# but onto offscreen surfaces in worker processes, so the export runs as fast as
+# the cores allow instead of at clock.tick speed. Each worker renders a
+# contiguous chunk of frames; the chunks are collected in submission order, so
+# the output is always in frame order:
+#
+#     python export.py --freqs 1 2 3 --duration 600 --ffmpeg run.mp4
+#     python export.py --replay cube_snapshots.snap --images frames
+#     python export.py --replay cube_snapshots.snap --raw - | ffplay -f rawvideo ...
+#
+# Simulation runs radiate from the export camera's position, as WaveSim.py's
+# live view does; --origin places the source elsewhere.
+#
+# Image sequences are written by the workers themselves (PNG encoding is the
+# slow part); raw RGB24 frames are sent back and streamed to a file or pipe.
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Offscreen surfaces need no window
+
+WIDTH, HEIGHT = 800, 600
+FPS = 60
+CHUNK_FRAMES = 30  # Frames rendered per worker task
+IMAGE_PATTERN = "frame_{:06d}.png"
+BACKGROUND = (0, 0, 0)
+
+
+def simulation_source(grid_size=18, spacing=30, frequencies=(0, 0, 0), origin=(0, 0, 0), dt=None):
+    """Source spec for a WaveSimulator run, one simulation step per frame as in the live view."""
+    return {"kind": "simulation", "grid_size": grid_size, "spacing": spacing,
+            "frequencies": list(frequencies), "origin": list(origin), "dt": dt}
+
+
+def replay_source(filename, fps=FPS, speed=1.0):
+    """Source spec for a .snap capture, interpolated to fps frames per second of capture time."""
+    return {"kind": "replay", "filename": filename, "fps": fps, "speed": speed}
+
+
+class SimulationFrames:
+    """Frames of a headless WaveSimulator run."""
+
+    def __init__(self, grid_size, spacing, frequencies, origin=(0, 0, 0), dt=None):
+        from simulator import TIME_STEP, WaveSimulator
+
+        self.sim = WaveSimulator(grid_size, spacing, frequencies, origin=tuple(origin), dt=dt or TIME_STEP)
+        self.points = self.sim.points
+        self._buffer = None
+
+    def frames(self, start, count):
+        """(count, N) intensities of frames start .. start + count - 1."""
+        if self._buffer is None or len(self._buffer) < count:
+            self._buffer = np.empty((count, self.sim.num_points), dtype=np.float32)
+        self.sim.sim_time = start * self.sim.dt
+        return self.sim.sample(count, out=self._buffer[:count])
+
+
+class ReplayFrames:
+    """Frames of a recorded .snap capture, interpolated with playback.Player."""
+
+    def __init__(self, filename, fps=FPS, speed=1.0):
+        from playback import Player
+
+        self.player = Player.from_file(filename, loop=False)
+        self.points = self.player.points
+        self.step = speed / fps  # Capture seconds per frame
+
+    def __len__(self):
+        return int(self.player.duration / self.step) + 1
+
+    def frames(self, start, count):
+        for k in range(start, start + count):
+            self.player.seek(self.player.start + k * self.step)
+            yield self.player.frame()
+
+
+def open_source(spec):
+    options = {key: value for key, value in spec.items() if key != "kind"}
+    if spec["kind"] == "simulation":
+        return SimulationFrames(**options)
+    return ReplayFrames(**options)
+
+
+# Per-process render state, built once by _init_worker
+_worker = None
+
+
+class FrameRenderer:
+    """Renders a source's frames to an offscreen surface through a fixed camera."""
+
+    def __init__(self, spec, view):
+        import pygame
+        from camera import Camera
+        from renderer import PointRenderer, brightness_colors, heat_colors
+
+        self.pygame = pygame
+        self.source = open_source(spec)
+        self.surface = pygame.Surface((view["width"], view["height"]))
+        self.renderer = PointRenderer(view["width"], view["height"], radius=view["radius"],
+                                      background=BACKGROUND)
+        self.color_map = heat_colors if view["colors"] == "heat" else brightness_colors
+        camera = Camera(view["x"], view["y"], view["z"], view["angle_x"], view["angle_y"],
+                        fov=view["fov"], width=view["width"], height=view["height"])
+        # The camera never moves during an export: project once and keep only the visible points
+        screen_points, depth, visible = camera.project(np.asarray(self.source.points, dtype=float),
+                                                       margin=view["radius"])
+        self.index = np.flatnonzero(visible)
+        self.screen_points, self.depth = screen_points[self.index], depth[self.index]
+
+    def render(self, intensities):
+        colors = self.color_map(intensities[self.index])
+        self.renderer.draw(self.surface, self.screen_points, self.depth, colors)
+        return self.surface
+
+    def rgb_bytes(self):
+        """Current frame as packed RGB24 rows (top to bottom), as rawvideo expects."""
+        return self.pygame.surfarray.pixels3d(self.surface).transpose(1, 0, 2).tobytes()
+
+
+def _init_worker(spec, view):
+    global _worker
+    _worker = FrameRenderer(spec, view)
+
+
+def _render_chunk(start, count, image_dir):
+    """Render frames start .. start + count - 1; saves PNGs, or returns the raw frames."""
+    raw = []
+    for k, intensities in enumerate(_worker.source.frames(start, count), start):
+        surface = _worker.render(intensities)
+        if image_dir:
+            _worker.pygame.image.save(surface, os.path.join(image_dir, IMAGE_PATTERN.format(k)))
+        else:
+            raw.append(_worker.rgb_bytes())
+    return b"".join(raw)
+
+
+def render_chunks(spec, view, num_frames, image_dir=None, workers=None, chunk=CHUNK_FRAMES):
+    """Render num_frames frames in parallel; yields (frame count, raw bytes) per chunk, in frame order.
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    however slowly the output is consumed.
+    """
+    workers = workers or os.cpu_count() or 1
+    starts = iter(range(0, num_frames, chunk))
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec, view)) as pool:
+        for start in starts:
+            pending.append((start, pool.submit(_render_chunk, start, min(chunk, num_frames - start), image_dir)))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            start, future = pending.popleft()
+            data = future.result()
+            next_start = next(starts, None)
+            if next_start is not None:
+                pending.append((next_start, pool.submit(_render_chunk, next_start,
+                                                        min(chunk, num_frames - next_start), image_dir)))
+            yield min(chunk, num_frames - start), data
+
+
+def ffmpeg_command(filename, width=WIDTH, height=HEIGHT, fps=FPS):
+    """ffmpeg invocation encoding RGB24 frames from stdin to filename."""
+    return ["ffmpeg", "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            "-pix_fmt", "yuv420p", filename]
+
+
+def export(spec, view, num_frames, fps=FPS, image_dir=None, raw=None, command=None, workers=None):
+    """Render num_frames frames to an image directory, a raw RGB24 file ("-" for stdout) or a command's stdin."""
+    process = None
+    out = None
+    if image_dir:
+        os.makedirs(image_dir, exist_ok=True)
+    elif command:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        out = process.stdin
+    elif raw == "-":
+        out = sys.stdout.buffer
+    else:
+        out = open(raw, "wb")
+
+    start = time.perf_counter()
+    done = 0
+    try:
+        for count, data in render_chunks(spec, view, num_frames, image_dir, workers):
+            if out is not None:
+                out.write(data)
+            done += count
+            elapsed = time.perf_counter() - start
+            print(f"[{done}/{num_frames}] {done / elapsed:.1f} frames/s "
+                  f"({done / fps / elapsed:.2f}x real time)", file=sys.stderr)
+    finally:
+        if out is not None and out is not sys.stdout.buffer:
+            out.close()
+        if process is not None and process.wait() != 0:
+            raise RuntimeError(f"{command[0]} exited with status {process.returncode}")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render simulation runs or snapshot replays to video, headlessly.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--replay", help="Export a .snap capture instead of a simulation run")
+    source.add_argument("--freqs", type=float, nargs="+", default=[0, 0, 0])
+    parser.add_argument("--grid-size", type=int, default=18)
+    parser.add_argument("--spacing", type=float, default=30)
+    parser.add_argument("--duration", type=float, help="Seconds of video (default: the whole replay)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed")
+    parser.add_argument("--fps", type=int, default=FPS)
+    parser.add_argument("--width", type=int, default=WIDTH)
+    parser.add_argument("--height", type=int, default=HEIGHT)
+    parser.add_argument("--radius", type=int, help="Dot radius (default 3, or 1 above 32³)")
+    parser.add_argument("--colors", choices=["brightness", "heat"], default="brightness")
+    parser.add_argument("--camera", type=float, nargs=3, default=[0, 0, -500], metavar=("X", "Y", "Z"))
+    parser.add_argument("--origin", type=float, nargs=3, metavar=("X", "Y", "Z"),
+                        help="Wave source position (default: the camera position, as in WaveSim.py)")
+    parser.add_argument("--angle-x", type=float, default=0.0)
+    parser.add_argument("--angle-y", type=float, default=0.0)
+    parser.add_argument("--fov", type=float, default=600)
+    parser.add_argument("--workers", type=int, default=None)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--images", help="Directory for a PNG image sequence")
+    output.add_argument("--raw", help="File for raw RGB24 frames, - for stdout")
+    output.add_argument("--ffmpeg", help="Encode to this video file through ffmpeg")
+    output.add_argument("--pipe", help="Command reading raw RGB24 frames from stdin")
+    args = parser.parse_args()
+
+    if args.replay:
+        spec = replay_source(args.replay, args.fps, args.speed)
+        frames = open_source(spec)
+        grid_size = round(len(frames.points) ** (1 / 3))
+        num_frames = len(frames)
+    else:
+        spec = simulation_source(args.grid_size, args.spacing, args.freqs, args.origin or args.camera)
+        grid_size = args.grid_size
+        num_frames = 0
+    if args.duration is not None:
+        num_frames = int(args.duration * args.fps)
+    if num_frames <= 0:
+        parser.error("--duration is required for simulation runs")
+
+    x, y, z = args.camera
+    view = {"width": args.width, "height": args.height, "x": x, "y": y, "z": z,
+            "angle_x": args.angle_x, "angle_y": args.angle_y, "fov": args.fov,
+            "radius": args.radius or (3 if grid_size <= 32 else 1), "colors": args.colors}
+    command = None
+    if args.ffmpeg:
+        command = ffmpeg_command(args.ffmpeg, args.width, args.height, args.fps)
+    elif args.pipe:
+        command = shlex.split(args.pipe)
+
+    elapsed = export(spec, view, num_frames, args.fps, args.images, args.raw, command, args.workers)
+    print(f"{num_frames} frames in {elapsed:.1f}s ({num_frames / args.fps / elapsed:.2f}x real time)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
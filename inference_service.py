@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import json
+import threading
+
+import numpy as np
+
+from lookup_index import MIN_SIMILARITY, NgramIndex, lookup_response
+from reservoir import Reservoir
+from response_cache import MAX_ENTRIES, TTL, ResponseCache
+from response_encoder import ResponseEncoder
+from training_store import DB_FILE, TrainingStore, normalize
+
+# HTTP inference service behind indexnew.php. A plain ASGI application (run it
+# with `python inference_service.py` or `uvicorn inference_service:app`) serving
+# POST /regbutton with the JSON contract the page uses: {"input_data": ...} in,
+# {"message": ...} or {"error": ...} out. The training store, lookup index and
+# reservoir load once at startup. Concurrent requests are gathered into
+# micro-batches: every prompt in a batch is looked up, encoded into its wave
+# pattern, and all patterns settle through the reservoir as one sparse-dense
+# product per step, on a worker thread so the event loop keeps accepting.
+# Answers are cached per normalized input_data with identical concurrent
+# requests coalesced; POST /learn teaches a prompt (the service's
+# reinforce_learning) and invalidates what it affects, and GET /metrics reports
+# the cache counters. Lessons taught by other processes (wave_Train.py) are
+# noticed through the store's data_version on every request: the cache is
+# dropped and the new prompts join the lookup index.
+
+GRID_SIZE = 18  # Same lattice as wave_Train.py
+SETTLE_STEPS = 5
+MAX_BATCH = 64
+MAX_DELAY = 0.002  # Seconds a batch waits to fill up
+UNKNOWN_MESSAGE = "I don't know that yet! Teach me?"
+
+
+class InferenceModel:
+    """Prompt lookup, wave encoding and reservoir pass for batches of prompts."""
+
+    def __init__(self, db_path=DB_FILE, grid_size=GRID_SIZE, settle_steps=SETTLE_STEPS,
+                 min_similarity=MIN_SIMILARITY, seed=0):
+        self.store = TrainingStore(db_path)
+        self.data_version = self.store.data_version()  # Taken first so later writes are never missed
+        self.index = NgramIndex(prompt for prompt, _, _ in self.store.items())
+        self.encoder = ResponseEncoder(grid_size)
+        self.reservoir = Reservoir(grid_size, seed=seed)
+        self.settle_steps = settle_steps
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()  # The index is not safe to search while it grows
+
+    def predict(self, texts):
+        """One result dict per prompt: message, confidence, reservoir activity and matched prompt."""
+        with self._lock:
+            found = [lookup_response(self.store, self.index, text, self.min_similarity) for text in texts]
+        known = [i for i, f in enumerate(found) if f is not None]
+        activity = np.zeros(len(texts))
+        if known:
+            patterns = np.stack([self.encoder.encode(found[i][0]).ravel() * found[i][1] for i in known])
+            states = self.reservoir.settle(patterns, self.settle_steps)
+            activity[known] = np.abs(states).mean(axis=1)
+
+        results = []
+        for f, level in zip(found, activity):
+            if f is None:
+                results.append({"message": UNKNOWN_MESSAGE, "confidence": 0.0, "prompt": None})
+            else:
+                results.append({"message": f[0], "confidence": round(f[1], 4), "activity": float(level),
+                                "prompt": f[2]})
+        return results
+
+    def learn(self, text, response):
+        """Teach or reinforce a prompt, as wave_Train.reinforce_learning does; returns (confidence, is_new)."""
+        key = normalize(text)
+        with self._lock:
+            confidence = self.store.learn(key, response)
+            is_new = key not in self.index
+            self.index.add(key)
+        return confidence, is_new
+
+    def refresh(self):
+        """Index prompts taught by other processes since the last call; returns whether the store changed."""
+        with self._lock:
+            version = self.store.data_version()
+            if version == self.data_version:
+                return False
+            self.data_version = version
+            for prompt, _, _ in self.store.items():
+                self.index.add(prompt)  # No-op for prompts already indexed
+        return True
+
+    def close(self):
+        self.store.close()
+
+
+class MicroBatcher:
+    """Collects concurrent submissions and runs them through `handler` as one batch."""
+
+    def __init__(self, handler, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = None
+        self._task = None
+
+    async def submit(self, item):
+        """Result of `handler` for one item, computed alongside whatever else is queued."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # The next batch fills up while this one runs on a worker thread
+            try:
+                results = await loop.run_in_executor(None, self.handler, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class InferenceApp:
+    """ASGI application serving POST /regbutton, POST /learn and GET /metrics."""
+
+    def __init__(self, db_path=DB_FILE, grid_size=GRID_SIZE, max_batch=MAX_BATCH, max_delay=MAX_DELAY,
+                 cache_size=MAX_ENTRIES, cache_ttl=TTL):
+        self.db_path = db_path
+        self.grid_size = grid_size
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self.model = None
+        self.batcher = None
+        self._startup_lock = None
+
+    async def startup(self):
+        """Load the model once (on lifespan startup, or on the first request without lifespan)."""
+        if self.model is not None:
+            return
+        if self._startup_lock is None:
+            self._startup_lock = asyncio.Lock()
+        async with self._startup_lock:
+            if self.model is None:
+                loop = asyncio.get_running_loop()
+                self.model = await loop.run_in_executor(None, InferenceModel, self.db_path, self.grid_size)
+                self.batcher = MicroBatcher(self.model.predict, self.max_batch, self.max_delay)
+
+    async def shutdown(self):
+        if self.model is not None:
+            await self.batcher.close()
+            self.model.close()
+            self.model = self.batcher = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        routes = {"/regbutton": ("POST", self._regbutton), "/learn": ("POST", self._learn),
+                  "/metrics": ("GET", self._metrics)}
+        if scope["path"] not in routes:
+            await respond(send, 404, {"error": "Not found"})
+            return
+        method, handler = routes[scope["path"]]
+        if scope["method"] == "OPTIONS":
+            await respond(send, 204, None)  # CORS preflight
+            return
+        if scope["method"] != method:
+            await respond(send, 405, {"error": "Method not allowed"})
+            return
+
+        data = None
+        if method == "POST":
+            try:
+                data = json.loads(await read_body(receive) or b"null")
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                pass
+            if not isinstance(data, dict) or not isinstance(data.get("input_data"), str):
+                await respond(send, 400, {"error": "Missing input_data"})
+                return
+
+        try:
+            await self.startup()
+            status, payload = await handler(data)
+        except Exception as e:
+            status, payload = 500, {"error": str(e)}
+        await respond(send, status, payload)
+
+    async def _sync(self):
+        """Drop the cache and extend the index after another process wrote to the store."""
+        if self.model.store.data_version() == self.model.data_version:
+            return
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, self.model.refresh):
+            # Any answer may have changed, and unknown prompts may now be taught
+            self.cache.invalidate(predicate=lambda k, v: True)
+
+    async def _regbutton(self, data):
+        input_data = data["input_data"]
+        await self._sync()
+        result = await self.cache.get_or_compute(normalize(input_data),
+                                                 lambda: self.batcher.submit(input_data))
+        return 200, {k: v for k, v in result.items() if k != "prompt"}
+
+    async def _learn(self, data):
+        response = data.get("response")
+        if not isinstance(response, str):
+            return 400, {"error": "Missing response"}
+        loop = asyncio.get_running_loop()
+        confidence, is_new = await loop.run_in_executor(None, self.model.learn, data["input_data"], response)
+        key = normalize(data["input_data"])
+        # Answers drawn from this prompt are stale; a new prompt may also be a
+        # closer match for anything that was answered fuzzily or not at all
+        self.cache.invalidate(key, lambda k, v: v["prompt"] == key or (is_new and v["prompt"] != k))
+        return 200, {"message": f"Learned: '{key}' → '{response}'", "confidence": confidence}
+
+    async def _metrics(self, data):
+        return 200, self.cache.metrics()
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def respond(send, status, payload):
+    """Send a JSON response (no body for payload None) with permissive CORS headers."""
+    body = b"" if payload is None else json.dumps(payload).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"access-control-allow-origin", b"*"),
+        (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+        (b"access-control-allow-headers", b"Content-Type"),
+    ]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+app = InferenceApp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve /regbutton for indexnew.php.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)  # Where indexnew.php sends requests
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--grid-size", type=int, default=GRID_SIZE)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-delay-ms", type=float, default=MAX_DELAY * 1000)
+    parser.add_argument("--cache-size", type=int, default=MAX_ENTRIES)
+    parser.add_argument("--cache-ttl", type=float, default=TTL)
+    args = parser.parse_args()
+
+    import uvicorn  # Only needed to serve; the app itself is plain ASGI
+
+    service = InferenceApp(args.db, args.grid_size, args.max_batch, args.max_delay_ms / 1000,
+                           args.cache_size, args.cache_ttl)
+    uvicorn.run(service, host=args.host, port=args.port, lifespan="on")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import math
+from array import array
+
+import numpy as np
+
+from training_store import normalize
+
+# Fuzzy retrieval over taught prompts. Every prompt is split into character
+# n-grams and stored in an inverted index (n-gram -> postings of prompt ids and
+# weights). A query only touches the postings of its own n-grams and scores all
+# matching prompts at once with np.bincount. Common n-grams (" th", "the", ...)
+# have long postings, so the work is capped: the query's n-grams are taken
+# rarest first and scored exhaustively up to POSTINGS_BUDGET postings; past
+# that, the MAX_CANDIDATES best prompts so far are scored in full from a
+# forward index (each prompt's own n-grams) instead of walking the remaining
+# postings. Queries within the budget are scored exactly; beyond it the ranking
+# is approximate but the cost no longer grows with the common n-grams.
+#
+# Postings hold raw (sublinear) term frequencies and IDF is applied at query
+# time. A prompt's vector length is taken with the IDF of the moment it was
+# inserted, so adding a prompt never reweights the others; all lengths are
+# recomputed in one vectorized pass once the index has grown by REFRESH_GROWTH
+# since the last pass, which bounds the drift.
+
+NGRAM = 3
+MIN_SIMILARITY = 0.5  # Weakest fuzzy match still trusted to answer
+REFRESH_GROWTH = 1.1
+POSTINGS_BUDGET = 30000  # Postings scored exhaustively per query, rarest n-grams first
+MAX_CANDIDATES = 256  # Prompts rescored in full once the budget is spent
+
+
+def char_ngrams(text, n=NGRAM):
+    """Character n-grams of a text padded with one space on each side."""
+    padded = f" {text} "
+    if len(padded) < n:
+        return [padded]
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+def ngram_counts(text, n=NGRAM):
+    counts = {}
+    for gram in char_ngrams(text, n):
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class NgramIndex:
+    """Incremental character n-gram TF-IDF index with cosine-similarity search."""
+
+    def __init__(self, texts=(), n=NGRAM):
+        self.n = n
+        self.texts = []
+        self._ids = {}
+        self._postings = {}  # n-gram -> (array of prompt ids, array of term weights)
+        self._gram_ids = {}  # n-gram -> id used by the forward index
+        # Forward index (CSR): the n-gram ids and term weights of each prompt, for rescoring candidates
+        self._doc_grams = array("i")
+        self._doc_tf = array("f")
+        self._doc_start = array("q", [0])
+        self._norms = array("f")  # TF-IDF vector length of each prompt
+        self._norms_size = 0  # Index size at the last full recomputation of the lengths
+        for text in texts:
+            self.add(text)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __contains__(self, text):
+        return text in self._ids
+
+    def add(self, text):
+        """Index a prompt (no-op if it is already indexed); returns its id."""
+        if text in self._ids:
+            return self._ids[text]
+        doc = len(self.texts)
+        self.texts.append(text)
+        self._ids[text] = doc
+
+        norm = 0.0
+        for gram, count in ngram_counts(text, self.n).items():
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = (array("i"), array("f"))
+            postings[0].append(doc)
+            postings[1].append(1 + math.log(count))  # Sublinear term frequency
+            self._doc_grams.append(self._gram_ids.setdefault(gram, len(self._gram_ids)))
+            self._doc_tf.append(1 + math.log(count))
+            norm += ((1 + math.log(count)) * self._idf(len(postings[0]))) ** 2
+        self._doc_start.append(len(self._doc_grams))
+        self._norms.append(math.sqrt(norm))
+        return doc
+
+    def _idf(self, df):
+        """Smoothed inverse document frequency."""
+        return math.log((1 + len(self.texts)) / (1 + df)) + 1
+
+    def refresh_norms(self):
+        """Recompute every prompt's vector length with the current IDF."""
+        total = len(self.texts)
+        ids, weights = [], []
+        for doc_ids, tf in self._postings.values():
+            ids.append(np.frombuffer(doc_ids, dtype=np.int32))
+            weights.append(np.square(np.frombuffer(tf, dtype=np.float32) * self._idf(len(doc_ids))))
+        if ids:
+            norms = np.sqrt(np.bincount(np.concatenate(ids), np.concatenate(weights), minlength=total))
+            self._norms = array("f", norms.astype(np.float32).tobytes())
+        self._norms_size = total
+
+    def search(self, text, k=1):
+        """Up to k (prompt, similarity) pairs, most similar first; similarity is in [0, 1]."""
+        total = len(self.texts)
+        if total > self._norms_size * REFRESH_GROWTH:
+            self.refresh_norms()
+        grams = []  # (n-gram, postings, query weight * idf) of the query's indexed n-grams
+        norm = 0.0
+        for gram, count in ngram_counts(text, self.n).items():
+            postings = self._postings.get(gram)
+            # N-grams no prompt contains still count towards the query length
+            idf = self._idf(len(postings[0]) if postings else 0)
+            weight = (1 + math.log(count)) * idf
+            norm += weight * weight
+            if postings:
+                grams.append((gram, postings, weight * idf))
+        if not grams:
+            return []
+
+        # The rarest n-grams are scored exhaustively up to a postings budget
+        grams.sort(key=lambda g: len(g[1][0]))
+        split, scanned = 1, len(grams[0][1][0])
+        while split < len(grams) and scanned + len(grams[split][1][0]) <= POSTINGS_BUDGET:
+            scanned += len(grams[split][1][0])
+            split += 1
+        ids = np.concatenate([np.frombuffer(postings[0], dtype=np.int32) for _, postings, _ in grams[:split]])
+        weights = np.concatenate([np.frombuffer(postings[1], dtype=np.float32) * w
+                                  for _, postings, w in grams[:split]])
+        scores = np.bincount(ids, weights, minlength=total)
+        norms = np.frombuffer(self._norms, dtype=np.float32)
+        if split < len(grams):
+            # Past the budget, keep the best prompts so far and score them in full
+            # from the forward index instead of walking the long postings
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > MAX_CANDIDATES:
+                partial = scores[candidates] / norms[candidates]
+                candidates = candidates[np.argpartition(-partial, MAX_CANDIDATES)[:MAX_CANDIDATES]]
+            rescored = self._rescore(candidates, grams)
+            scores = np.zeros(total)
+            scores[candidates] = rescored
+        scores /= norms * math.sqrt(norm)
+        if k >= total:
+            best = np.argsort(-scores)
+        else:
+            best = np.argpartition(-scores, k)[:k]
+            best = best[np.argsort(-scores[best])]
+        return [(self.texts[i], float(min(scores[i], 1.0))) for i in best if scores[i] > 0]
+
+    def _rescore(self, candidates, grams):
+        """Full dot products of the candidate prompts with the query, from the forward index."""
+        query = sorted((self._gram_ids[gram], w) for gram, _, w in grams)
+        query_ids = np.array([gram_id for gram_id, _ in query], dtype=np.int32)
+        query_weights = np.array([w for _, w in query])
+        starts = np.frombuffer(self._doc_start, dtype=np.int64)
+        lengths = starts[candidates + 1] - starts[candidates]
+        # Positions of every candidate's entries, laid out candidate by candidate
+        entries = np.repeat(starts[candidates] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        doc_grams = np.frombuffer(self._doc_grams, dtype=np.int32)[entries]
+        pos = np.minimum(np.searchsorted(query_ids, doc_grams), len(query_ids) - 1)
+        values = np.where(query_ids[pos] == doc_grams,
+                          np.frombuffer(self._doc_tf, dtype=np.float32)[entries] * query_weights[pos], 0.0)
+        return np.bincount(np.repeat(np.arange(len(candidates)), lengths), values, minlength=len(candidates))
+
+    def nearest(self, text):
+        """The most similar (prompt, similarity), or None if nothing shares an n-gram."""
+        results = self.search(text, 1)
+        return results[0] if results else None
+
+
+def lookup_response(store, index, text, min_similarity=MIN_SIMILARITY):
+    """(response, confidence, matched prompt) from a TrainingStore, or None if unknown.
+
+    An exact match is used as stored; otherwise the closest indexed prompt at
+    or above min_similarity answers, its confidence scaled by the similarity.
+    """
+    entry = store.get(text)
+    if entry is not None:
+        return entry["response"], entry["confidence"], normalize(text)
+    match = index.nearest(normalize(text))
+    if match is None or match[1] < min_similarity:
+        return None
+    entry = store.get(match[0])
+    if entry is None:
+        return None
+    return entry["response"], entry["confidence"] * match[1], match[0]
@@ -0,0 +1,211 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from reservoir import local_weights
+
+# Multi-core reservoir stepping by domain decomposition. The lattice is cut into
+# slabs of whole x-planes; because cube_points / make_lattice order nodes
+# x-major, every slab is one contiguous range of node indices. Each worker
+# process owns the CSR rows of its slab and steps them against double-buffered
+# state arrays in shared memory. The only data a slab needs from its
+# neighbours is one x-plane on each side (the halo), which it reads straight
+# out of the shared previous-step buffer after the per-step barrier. A watchdog
+# thread waits on the workers' sentinels and breaks the barrier the moment one
+# exits, however it died (exception, signal, OOM kill), and the parent waits
+# with a timeout for workers that hang; either way step raises RuntimeError
+# instead of blocking forever.
+
+STEP, STOP = 0, 1
+NO_INPUT, NODE_INPUT, GRID_INPUT = 0, 1, 2
+STEP_TIMEOUT = 60.0  # Seconds the parent waits for live workers at a barrier
+EXIT_GRACE = 1.0  # Seconds the workers get to exit once the barrier is broken
+
+
+def slab_bounds(grid_size, parts):
+    """(start, end) node-index ranges of `parts` slabs of whole x-planes."""
+    plane = grid_size ** 2
+    planes = np.array_split(np.arange(grid_size), parts)
+    return [(int(p[0]) * plane, (int(p[-1]) + 1) * plane) for p in planes if len(p)]
+
+
+def _worker(shm_names, num_nodes, dtype, slab, halo, weights, leak, input_scale, barrier):
+    states_shm = shared_memory.SharedMemory(name=shm_names[0])
+    inputs_shm = shared_memory.SharedMemory(name=shm_names[1])
+    control_shm = shared_memory.SharedMemory(name=shm_names[2])
+    states = np.ndarray((2, num_nodes), dtype=dtype, buffer=states_shm.buf)
+    inputs = np.ndarray(num_nodes, dtype=dtype, buffer=inputs_shm.buf)
+    control = np.ndarray(3, dtype=np.int64, buffer=control_shm.buf)
+    start, end = slab
+    lo, hi = halo
+    grid_size = round(num_nodes ** (1 / 3))
+    grid_index = np.arange(start, end) // grid_size  # Node (i, j, k) reads grid cell (i, j)
+    drive = np.empty(end - start, dtype=dtype)
+    try:
+        while True:
+            barrier.wait()
+            command, parity, input_kind = control
+            if command == STOP:
+                break
+            old, new = states[parity], states[1 - parity]
+            # Slab rows against the slab plus its halo planes
+            drive[:] = weights @ old[lo:hi]
+            if input_kind == NODE_INPUT:
+                drive += input_scale * inputs[start:end]
+            elif input_kind == GRID_INPUT:
+                drive += input_scale * inputs[grid_index]
+            np.tanh(drive, out=drive)
+            drive *= leak
+            np.multiply(old[start:end], 1 - leak, out=new[start:end])
+            new[start:end] += drive
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        pass  # The parent gave up on the pool
+    except BaseException:
+        barrier.abort()  # Release the parent rather than leave it waiting for this slab
+        raise
+    finally:
+        del states, inputs, control
+        states_shm.close()
+        inputs_shm.close()
+        control_shm.close()
+
+
+class ParallelReservoir:
+    """Same dynamics and weights as reservoir.Reservoir, stepped by a pool of slab workers."""
+
+    def __init__(self, grid_size, workers=None, leak=0.3, spectral_radius=0.9, input_scale=0.5,
+                 periodic=False, seed=None, dtype=np.float32, timeout=STEP_TIMEOUT):
+        if periodic:
+            raise ValueError("Periodic connectivity needs wrap-around halos; use reservoir.Reservoir")
+        self.grid_size = grid_size
+        self.num_nodes = grid_size ** 3
+        self.leak = leak
+        self.input_scale = input_scale
+        self.timeout = timeout
+        self.dtype = np.dtype(dtype)
+        weights = local_weights(grid_size, spectral_radius, periodic, seed, dtype)
+
+        nbytes = self.num_nodes * self.dtype.itemsize
+        self._states_shm = shared_memory.SharedMemory(create=True, size=2 * nbytes)
+        self._inputs_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._control_shm = shared_memory.SharedMemory(create=True, size=3 * 8)
+        self._states = np.ndarray((2, self.num_nodes), dtype=self.dtype, buffer=self._states_shm.buf)
+        self._inputs = np.ndarray(self.num_nodes, dtype=self.dtype, buffer=self._inputs_shm.buf)
+        self._control = np.ndarray(3, dtype=np.int64, buffer=self._control_shm.buf)
+        self._states.fill(0)
+        self._control[:] = (STEP, 0, 0)
+        self._parity = 0
+
+        workers = workers or os.cpu_count()
+        self.slabs = slab_bounds(grid_size, workers)
+        plane = grid_size ** 2
+        ctx = mp.get_context("spawn")
+        self._barrier = ctx.Barrier(len(self.slabs) + 1)
+        names = (self._states_shm.name, self._inputs_shm.name, self._control_shm.name)
+        self._procs = []
+        for start, end in self.slabs:
+            halo = (max(start - plane, 0), min(end + plane, self.num_nodes))
+            slab_weights = weights[start:end, halo[0]:halo[1]].tocsr()
+            proc = ctx.Process(target=_worker, daemon=True,
+                               args=(names, self.num_nodes, self.dtype, (start, end), halo,
+                                     slab_weights, leak, input_scale, self._barrier))
+            proc.start()
+            self._procs.append(proc)
+        self._stopping = False
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    @property
+    def state(self):
+        """Current reservoir state (a view into shared memory, valid until the next step)."""
+        return self._states[self._parity]
+
+    def reset(self):
+        self._states.fill(0)
+
+    def step(self, inputs=None):
+        """Advance one step across all workers and return the state."""
+        input_kind = NO_INPUT
+        if inputs is not None:
+            inputs = np.asarray(inputs)
+            if inputs.shape == (self.grid_size, self.grid_size):
+                # Only the G*G grid is copied; each worker expands it along z for its slab
+                input_kind = GRID_INPUT
+                self._inputs[:inputs.size] = inputs.ravel()
+            else:
+                input_kind = NODE_INPUT
+                self._inputs[:] = inputs
+        self._control[:] = (STEP, self._parity, input_kind)
+        self._wait()  # Workers start the step
+        self._wait()  # All slabs written
+        self._parity = 1 - self._parity
+        return self.state
+
+    def run(self, inputs, out=None):
+        """Step once per input (a (T, G, G) or (T, N) stack) and return the (T, N) states."""
+        if out is None:
+            out = np.empty((len(inputs), self.num_nodes), dtype=self.dtype)
+        for t, step_input in enumerate(inputs):
+            out[t] = self.step(step_input)
+        return out
+
+    def _watch(self):
+        """Break the barrier as soon as any worker exits while the pool is running."""
+        wait([proc.sentinel for proc in self._procs])
+        if not self._stopping:
+            self._barrier.abort()
+
+    def _wait(self):
+        """Meet the workers at the barrier, raising RuntimeError if one of them is gone."""
+        if not self._procs:
+            raise RuntimeError("The reservoir workers have stopped")
+        try:
+            self._barrier.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            # Healthy workers leave with exit code 0 once the barrier is broken
+            deadline = time.monotonic() + EXIT_GRACE
+            for proc in self._procs:
+                proc.join(max(deadline - time.monotonic(), 0))
+            dead = [(i, proc.exitcode) for i, proc in enumerate(self._procs) if proc.exitcode]
+            self._stop_workers()
+            if dead:
+                detail = ", ".join(f"slab {i} (exit code {code})" for i, code in dead)
+                raise RuntimeError(f"Reservoir worker died: {detail}") from None
+            raise RuntimeError(f"Reservoir workers did not reach the barrier within {self.timeout}s") from None
+
+    def _stop_workers(self):
+        self._stopping = True
+        self._barrier.abort()
+        for proc in self._procs:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+        self._procs = []
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        if self._procs:
+            self._stopping = True
+            self._control[0] = STOP
+            try:
+                self._barrier.wait(self.timeout)
+            except threading.BrokenBarrierError:
+                self._stop_workers()
+            for proc in self._procs:
+                proc.join()
+            self._procs = []
+        del self._states, self._inputs, self._control
+        for shm in (self._states_shm, self._inputs_shm, self._control_shm):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,107 @@
+import numpy as np
+
+import snapshot_store
+
+# Playback engine for captured snapshots. The capture stays one (T, N)
+# intensity array (memory-mapped straight from the .snap file), and the player
+# keeps a position on the capture's own time axis. Each frame linearly
+# interpolates between the two snapshots around that position, so a capture
+# taken once per second still plays back smoothly at 60 fps, at any speed,
+# forwards or backwards. Consecutive frames find their snapshots from the
+# previous cursor, so a frame costs two row reads however long the capture is;
+# only a seek does a binary search.
+
+
+class Player:
+    """Seekable, variable-speed, interpolating playback of (T,) times and (T, N) intensities."""
+
+    def __init__(self, times, intensities, speed=1.0, loop=True):
+        if len(times) == 0:
+            raise ValueError("Nothing to play: the capture has no snapshots")
+        self.times = times
+        self.intensities = intensities
+        self.speed = speed
+        self.loop = loop
+        self.playing = True
+        self.position = float(times[0])
+        self._cursor = 0
+        self._frame = np.empty(intensities.shape[1], dtype=np.float32)
+
+    @classmethod
+    def from_file(cls, filename, **kwargs):
+        """Player over a .snap file; the snapshot points are kept as .points."""
+        snapshots = snapshot_store.load_snapshots(filename)
+        player = cls(snapshots.times, snapshots.intensities, **kwargs)
+        player.points = np.asarray(snapshots.points, dtype=np.float64)
+        return player
+
+    @property
+    def start(self):
+        return float(self.times[0])
+
+    @property
+    def end(self):
+        return float(self.times[-1])
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    @property
+    def progress(self):
+        """Position as a fraction of the capture, 0 to 1."""
+        return (self.position - self.start) / self.duration if self.duration > 0 else 0.0
+
+    def seek(self, position):
+        """Jump to a capture time (clamped to the capture)."""
+        self.position = min(max(float(position), self.start), self.end)
+        self._cursor = max(int(np.searchsorted(self.times, self.position, side="right")) - 1, 0)
+
+    def seek_fraction(self, fraction):
+        self.seek(self.start + fraction * self.duration)
+
+    def toggle(self):
+        self.playing = not self.playing
+
+    def advance(self, seconds):
+        """Move the position by seconds of wall time at the current speed."""
+        if not self.playing or self.duration <= 0:
+            return
+        position = self.position + seconds * self.speed
+        if self.start <= position <= self.end:
+            self.position = position
+        elif self.loop:
+            self.seek(self.start + (position - self.start) % self.duration)
+        else:
+            self.seek(position)
+            self.playing = False
+
+    def _locate(self):
+        """Index i with times[i] <= position < times[i + 1], walking from the last cursor."""
+        i, times, last = self._cursor, self.times, len(self.times) - 1
+        if i < last and times[i] <= self.position < times[i + 1]:
+            return i
+        # The usual case: the position moved on by at most one snapshot
+        for j in (i + 1, i - 1):
+            if 0 <= j < last and times[j] <= self.position < times[j + 1]:
+                self._cursor = j
+                return j
+        if self.position >= times[last]:
+            self._cursor = last
+            return last
+        self.seek(self.position)
+        return self._cursor
+
+    def frame(self, out=None):
+        """Interpolated (N,) intensities at the current position (a reused buffer by default)."""
+        if out is None:
+            out = self._frame
+        i = self._locate()
+        if i >= len(self.times) - 1:
+            out[:] = self.intensities[-1]
+            return out
+        t0, t1 = float(self.times[i]), float(self.times[i + 1])
+        weight = (self.position - t0) / (t1 - t0) if t1 > t0 else 0.0
+        np.multiply(self.intensities[i], 1 - weight, out=out)
+        out += weight * self.intensities[i + 1]
+        return out
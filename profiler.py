@@ -0,0 +1,125 @@
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+# Lightweight per-frame instrumentation for the pygame viewers. Named spans
+# time each stage of the main loop into rolling windows (p50/p95/p99), an
+# optional HUD draws those numbers over the frame, and the raw spans can be
+# exported as a Chrome trace (load it in chrome://tracing or Perfetto). When
+# the profiler is disabled, span() hands back one shared no-op object, so the
+# instrumentation can stay in the hot path.
+
+WINDOW = 300  # Spans kept per name for the percentiles (about 5 s at 60 fps)
+MAX_TRACE_EVENTS = 200_000  # About 7 minutes of 8 spans per frame at 60 fps
+ENABLED = os.environ.get("WAVE_PROFILE", "") not in ("", "0")
+HUD_COLOR = (255, 255, 0)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Profiler:
+    """Named timing spans with rolling percentiles, a HUD and Chrome trace export."""
+
+    def __init__(self, enabled=ENABLED, window=WINDOW, trace=True, max_trace_events=MAX_TRACE_EVENTS):
+        self.enabled = enabled
+        self.window = window
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.durations = {}  # name -> deque of durations in ms
+        self.events = []  # (name, start ns, end ns) for the trace
+        self._frame_start = None
+        self._font = None
+
+    def span(self, name):
+        """Context manager timing the enclosed block under `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start, end):
+        """Record one span given perf_counter_ns() start and end times."""
+        window = self.durations.get(name)
+        if window is None:
+            window = self.durations[name] = deque(maxlen=self.window)
+        window.append((end - start) / 1e6)
+        if self.trace and len(self.events) < self.max_trace_events:
+            self.events.append((name, start, end))
+
+    def frame(self):
+        """Mark the end of a frame; the time between calls is recorded as "frame"."""
+        if not self.enabled:
+            self._frame_start = None
+            return
+        now = time.perf_counter_ns()
+        if self._frame_start is not None:
+            self.record("frame", self._frame_start, now)
+        self._frame_start = now
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._frame_start = None
+
+    def percentiles(self, name, q=(50, 95, 99)):
+        """Rolling percentiles of a span in ms, or None if it was never recorded."""
+        window = self.durations.get(name)
+        if not window:
+            return None
+        return tuple(float(p) for p in np.percentile(np.fromiter(window, float, len(window)), q))
+
+    def stats(self):
+        """{name: (p50, p95, p99)} in ms for every recorded span."""
+        return {name: self.percentiles(name) for name in self.durations if self.durations[name]}
+
+    def draw_hud(self, surface, position=(10, 10)):
+        """Draw the per-span percentile table onto a pygame surface."""
+        if not self.enabled or not self.durations:
+            return
+        import pygame
+
+        if self._font is None:
+            self._font = pygame.font.SysFont('Courier', 14)  # Monospaced, so the columns line up
+        x, y = position
+        lines = [f"{'span':<10}{'p50':>8}{'p95':>8}{'p99':>8} ms"]
+        for name, (p50, p95, p99) in self.stats().items():
+            lines.append(f"{name:<10}{p50:8.2f}{p95:8.2f}{p99:8.2f}")
+        for line in lines:
+            text = self._font.render(line, True, HUD_COLOR)
+            surface.blit(text, (x, y))
+            y += text.get_height()
+
+    def export_chrome_trace(self, filename):
+        """Write the recorded spans as Chrome trace JSON; returns the number of events."""
+        pid = os.getpid()
+        events = [{"name": name, "ph": "X", "ts": start / 1e3, "dur": (end - start) / 1e3,
+                   "pid": pid, "tid": 0} for name, start, end in self.events]
+        with open(filename, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        return len(events)
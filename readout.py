@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+# Linear readout of reservoir states, trained once in a precompute step and
+# loaded by memory map afterwards. Prediction is a NumPy dot product with the
+# stored weights, so a viewer that loads a saved readout never imports
+# scikit-learn.
+
+READOUT_DIR = "readout"
+
+
+class Readout:
+    """Logistic-regression readout as plain arrays: coef (C, N), intercept (C,), classes."""
+
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept = intercept
+        self.classes = classes
+
+    @classmethod
+    def fit(cls, states, labels, max_iter=1000):
+        """Fit on (T, N) states; scikit-learn is only imported here."""
+        from sklearn.linear_model import LogisticRegression
+
+        clf = LogisticRegression(max_iter=max_iter).fit(states, labels)
+        return cls(clf.coef_.astype(np.float32), clf.intercept_.astype(np.float32), clf.classes_)
+
+    def decision_function(self, states):
+        return np.atleast_2d(states) @ self.coef.T + self.intercept
+
+    def predict(self, states):
+        """Class of each (T, N) state row, as LogisticRegression.predict would give."""
+        scores = self.decision_function(states)
+        if scores.shape[1] == 1:
+            return self.classes[(scores[:, 0] > 0).astype(int)]
+        return self.classes[scores.argmax(axis=1)]
+
+    def save(self, directory=READOUT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for name in ("coef", "intercept", "classes"):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory=READOUT_DIR):
+        """Memory-mapped readout saved by save(); raises FileNotFoundError if missing."""
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                  for name in ("coef", "intercept", "classes")]
+        return cls(*arrays)
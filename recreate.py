@@ -1,13 +1,12 @@
 import pygame
-import time
+import snapshot_store
+from camera import Camera
+from playback import Player
+from renderer import PointRenderer, brightness_colors, heat_colors
 
-# Initialize Pygame
-pygame.init()
-
-# Screen setup
+# Screen setup (the pygame window itself is only opened when run as a script)
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Recreate Snapshot")
+FOV = 600
 
 # Grid parameters
 GRID_SIZE = 18
@@ -17,73 +16,110 @@ SPACING = 30
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 
-# Dot class for storing each dot's position and intensity
-class Dot:
-    def __init__(self, x, y, z, intensity):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.intensity = intensity
-
-    def draw(self):
-        color = (int(255 * abs(self.intensity)), 0, int(255 * (1 - abs(self.intensity))))
-        pygame.draw.circle(screen, color, (self.x, self.y), 5)
-
-# Load snapshots from the file
-def load_snapshots(filename="cube_snapshots.txt"):
-    snapshots = []
-    with open(filename, 'r') as file:
-        snapshot_data = file.read().split("\n\n")
-        
-        for snapshot in snapshot_data:
-            lines = snapshot.split("\n")
-            
-            if len(lines) > 0 and "at time" in lines[0]:
-                try:
-                    time_stamp_str = lines[0].split("at time")[1].strip()
-                    time_stamp = float(time_stamp_str.split(":")[0])
-                except (IndexError, ValueError) as e:
-                    print(f"Error processing time from snapshot: {e}")
-                    continue
-
-                points = []
-                for line in lines[1:]:
-                    if line.startswith("Point"):
-                        try:
-                            parts = line.split(",")
-                            point_data = parts[0].split(":")[1].strip()[1:-1].split(",")
-                            x, y, z = map(int, point_data)
-                            intensity = float(parts[1].split(":")[1].strip())
-                            points.append((x, y, z, intensity))
-                        except (IndexError, ValueError) as e:
-                            print(f"Error processing point: {e} - Line: {line}")
-                            continue
-
-                snapshots.append((time_stamp, points))
-
-    return snapshots
-
-# Main loop for recreating the snapshot
-def recreate_snapshots():
-    snapshots = load_snapshots()
+# Same camera and projection as the live viewers, so replays look like the live view
+camera = Camera(0, 0, -500, fov=FOV, width=WIDTH, height=HEIGHT)
+
+# Batched dot renderer, draws every point of a snapshot at once
+renderer = PointRenderer(WIDTH, HEIGHT, radius=3, background=BLACK)
+
+# Playback controls
+SEEK_STEP = 1.0  # Seconds of capture time per , / . press
+MIN_SPEED, MAX_SPEED = 1 / 16, 16
+PROGRESS_HEIGHT = 6
+
+# Load snapshots from the binary snapshot file (memory-mapped, nothing parsed up front)
+def load_snapshots(filename="cube_snapshots.snap"):
+    try:
+        return snapshot_store.load_snapshots(filename)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error loading snapshots: {e}")
+        return []
+
+# Main loop for replaying the snapshots
+def recreate_snapshots(screen, filename="cube_snapshots.snap"):
+    """Play a capture at 60 fps onto `screen` (the display surface), interpolating between snapshots.
+
+    Space pauses, , and . seek, [ and ] halve or double the speed, r reverses,
+    c switches colour maps, clicking the bar at the bottom jumps there, and
+    the arrows / WASD move the camera as in the live view.
+    """
+    snapshots = load_snapshots(filename)
     if not snapshots:
         print("No snapshots found!")
         return
 
-    for snapshot in snapshots:
-        time_stamp, points = snapshot
-        dots = [Dot(x, y, z, intensity) for x, y, z, intensity in points]
-
-        screen.fill(BLACK)
-
-        # Simulate the environment by drawing the dots
-        for dot in dots:
-            dot.draw()
+    player = Player(snapshots.times, snapshots.intensities)
+    points = snapshots.points.astype(float)
+    color_map = brightness_colors
+    font = pygame.font.SysFont('Arial', 18)
+    clock = pygame.time.Clock()
+    last_view = None  # Camera pose of the last projection
+    running = True
+
+    while running:
+        elapsed = clock.tick(60) / 1000
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    player.toggle()
+                elif event.key == pygame.K_PERIOD:
+                    player.seek(player.position + SEEK_STEP)
+                elif event.key == pygame.K_COMMA:
+                    player.seek(player.position - SEEK_STEP)
+                elif event.key == pygame.K_RIGHTBRACKET:
+                    player.speed = max(min(player.speed * 2, MAX_SPEED), -MAX_SPEED)
+                elif event.key == pygame.K_LEFTBRACKET:
+                    player.speed = player.speed / 2 if abs(player.speed) > MIN_SPEED else player.speed
+                elif event.key == pygame.K_r:
+                    player.speed = -player.speed
+                elif event.key == pygame.K_c:
+                    color_map = heat_colors if color_map is brightness_colors else brightness_colors
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                if event.pos[1] >= HEIGHT - 3 * PROGRESS_HEIGHT:
+                    player.seek_fraction(event.pos[0] / WIDTH)
+
+        # Camera Controls
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT]: camera.angle_y -= 0.05
+        if keys[pygame.K_RIGHT]: camera.angle_y += 0.05
+        if keys[pygame.K_UP]: camera.angle_x -= 0.05
+        if keys[pygame.K_DOWN]: camera.angle_x += 0.05
+        if keys[pygame.K_w]: camera.z += 20
+        if keys[pygame.K_s]: camera.z -= 20
+        if keys[pygame.K_a]: camera.x -= 20
+        if keys[pygame.K_d]: camera.x += 20
+
+        # Project only when the camera moved; a still camera keeps the last projection
+        view = (camera.x, camera.y, camera.z, camera.angle_x, camera.angle_y)
+        if view != last_view:
+            screen_points, depth, visible = camera.project(points, margin=3)
+            last_view = view
+
+        # Interpolated intensities at the playback position, drawn through the camera
+        player.advance(elapsed)
+        intensities = player.frame()
+        renderer.draw(screen, screen_points, depth, color_map(intensities), visible)
+
+        # Progress bar and playback status
+        bar = int(WIDTH * player.progress)
+        pygame.draw.rect(screen, WHITE, (0, HEIGHT - PROGRESS_HEIGHT, bar, PROGRESS_HEIGHT))
+        status = "" if player.playing else "  (paused)"
+        text = font.render(f"t = {player.position:.2f} / {player.end:.2f} s   speed {player.speed:g}x{status}",
+                           True, WHITE)
+        screen.blit(text, (10, HEIGHT - PROGRESS_HEIGHT - 26))
 
         pygame.display.flip()
-        time.sleep(1)  # Show each snapshot for 1 second
 
-# Start the recreation process
-recreate_snapshots()
+if __name__ == "__main__":
+    # Initialize Pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Recreate Snapshot")
+
+    # Start the recreation process
+    recreate_snapshots(screen)
 
-pygame.quit()
+    pygame.quit()
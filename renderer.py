@@ -0,0 +1,137 @@
+import numpy as np
+import pygame
+
+# Batched point renderer: instead of one pygame.draw.circle call per point,
+# every dot is stamped into a mapped-colour pixel buffer with array operations
+# and the buffer is copied to the surface once per frame.
+
+
+def brightness_colors(intensity):
+    """Blue-white colour map used by the live viewers: (b, b, 255) with b = 127 + 128 * I."""
+    brightness = np.clip((127 + 128 * np.asarray(intensity)).astype(int), 0, 255)
+    colors = np.empty((len(brightness), 3), dtype=np.uint8)
+    colors[:, 0] = brightness
+    colors[:, 1] = brightness
+    colors[:, 2] = 255
+    return colors
+
+
+def heat_colors(intensity):
+    """Red/blue colour map used by recreate.py: (255 * |I|, 0, 255 * (1 - |I|))."""
+    magnitude = np.abs(np.asarray(intensity, dtype=np.float64))
+    colors = np.zeros((len(magnitude), 3), dtype=np.uint8)
+    colors[:, 0] = np.clip(255 * magnitude, 0, 255).astype(int)
+    colors[:, 2] = np.clip(255 * (1 - magnitude), 0, 255).astype(int)
+    return colors
+
+
+def disc_offsets(radius):
+    """Pixel offsets covered by a filled dot of the given radius."""
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span, indexing="ij")
+    inside = dx ** 2 + dy ** 2 <= radius ** 2
+    return np.stack([dx[inside], dy[inside]], axis=1)
+
+
+class PointRenderer:
+    """Draws all points of a frame in one batch, far points first so near ones win."""
+
+    def __init__(self, width, height, radius=3, background=(0, 0, 0)):
+        self.width, self.height = width, height
+        self.radius = radius
+        self.background = background
+        self.offsets = disc_offsets(radius)
+        # Frame padded by two radii on every side: dots centred up to one radius
+        # off screen still touch it, and none of their pixels can fall outside
+        pad = 2 * radius
+        self._pad = pad
+        self._stride = height + 2 * pad
+        self._padded = np.empty((width + 2 * pad, self._stride), dtype=np.uint32)
+        self._flat_offsets = (self.offsets[:, 0] * self._stride + self.offsets[:, 1]).astype(np.int32)
+        self.frame = self._padded[pad:pad + width, pad:pad + height]
+        self._last_points = None
+        self._last_depth = None
+        self._owners = None
+
+    def _frame_owners(self, screen_points, depth):
+        """Pixel ownership of a full frame; reused while positions and depths are unchanged (static camera)."""
+        if (self._owners is None or not np.array_equal(depth, self._last_depth)
+                or not np.array_equal(screen_points, self._last_points)):
+            self._owners = self._owners_of(screen_points, np.argsort(-depth, kind="stable"))
+            self._last_points = screen_points.copy()
+            self._last_depth = depth.copy()
+        return self._owners
+
+    def _onscreen(self, screen_points, visible, bounds=None):
+        """Mask of the dots whose centre lies within one radius of the screen (or of bounds)."""
+        r = self.radius
+        x0, y0, x1, y1 = bounds or (0, 0, self.width, self.height)
+        onscreen = ((screen_points[:, 0] >= x0 - r) & (screen_points[:, 0] < x1 + r)
+                    & (screen_points[:, 1] >= y0 - r) & (screen_points[:, 1] < y1 + r))
+        if visible is not None:
+            onscreen &= visible
+        return onscreen
+
+    def _owners_of(self, screen_points, order):
+        """(pixels, dots): every padded-frame pixel the dots cover and the nearest dot over it.
+
+        Which of several writes to one index wins is unspecified in NumPy, so
+        the winner is picked explicitly: in the reversed (near-to-far) pixel
+        list the first occurrence of each pixel belongs to its nearest dot.
+        """
+        centers = ((screen_points[order, 0] + self._pad) * self._stride
+                   + screen_points[order, 1] + self._pad).astype(np.int32)
+        pixels = (centers[:, None] + self._flat_offsets).ravel()
+        unique, first = np.unique(pixels[::-1], return_index=True)
+        nearest = (len(pixels) - 1 - first) // len(self._flat_offsets)
+        return unique, order[nearest]
+
+    def _stamp(self, surface, colors, owners):
+        """Write each owned pixel of the padded frame in its dot's colour."""
+        pixels, dots = owners
+        mapped = pygame.surfarray.map_array(surface, colors[:, None, :])[:, 0]
+        self._padded.reshape(-1)[pixels] = mapped.astype(np.uint32)[dots]
+
+    def draw(self, surface, screen_points, depth, colors, visible=None):
+        """Render points into the surface, replacing its contents.
+
+        screen_points is (N, 2) pixel coordinates, depth the camera-space z
+        (larger is farther) and colors an (N, 3) uint8 array.
+        """
+        onscreen = self._onscreen(screen_points, visible)
+        screen_points, depth, colors = screen_points[onscreen], depth[onscreen], colors[onscreen]
+
+        self._padded.fill(surface.map_rgb(self.background))
+        self._stamp(surface, colors, self._frame_owners(screen_points, depth))
+        pygame.surfarray.blit_array(surface, self.frame)
+
+    def update(self, surface, screen_points, depth, colors, visible=None, changed=None):
+        """Redraw only the screen area around the changed points; returns the dirty rects.
+
+        changed is a per-point boolean mask (None redraws everything). Only dots
+        overlapping the bounding box of the changed ones are restamped, and the
+        returned rects are what pygame.display.update needs to show. An empty
+        list means nothing on screen changed.
+        """
+        if changed is None:
+            self.draw(surface, screen_points, depth, colors, visible)
+            return [surface.get_rect()]
+        moved = self._onscreen(screen_points, visible) & changed
+        if not moved.any():
+            return []
+
+        r = self.radius
+        x0 = max(int(screen_points[moved, 0].min()) - r, 0)
+        y0 = max(int(screen_points[moved, 1].min()) - r, 0)
+        x1 = min(int(screen_points[moved, 0].max()) + r + 1, self.width)
+        y1 = min(int(screen_points[moved, 1].max()) + r + 1, self.height)
+
+        # Every dot reaching into the box, changed or not, so overlaps stay depth-ordered
+        inside = self._onscreen(screen_points, visible, (x0, y0, x1, y1))
+        screen_points, depth, colors = screen_points[inside], depth[inside], colors[inside]
+        self.frame[x0:x1, y0:y1] = surface.map_rgb(self.background)
+        self._stamp(surface, colors, self._owners_of(screen_points, np.argsort(-depth, kind="stable")))
+
+        rect = pygame.Rect(x0, y0, x1 - x0, y1 - y0)
+        pygame.surfarray.blit_array(surface.subsurface(rect), self.frame[x0:x1, y0:y1])
+        return [rect]
@@ -0,0 +1,197 @@
+import numpy as np
+import scipy.sparse as sparse
+
+from activity import ACTIVITY_BLOCK, ActivityMask, block_max, dilate
+
+# Liquid-state reservoir over the GRID_SIZE³ lattice. Every node is a leaky
+# integrator connected only to its six face neighbours, so the recurrent
+# weights are a CSR matrix with at most 6 entries per row and one step costs
+# O(N): this scales to 10^5-10^6 nodes on one CPU. Node order matches
+# make_lattice / cube_points (x-major), so reservoir states line up with the
+# rest of the simulator.
+
+FULL_CHECK_INTERVAL = 8  # Steps between activity checks while the whole lattice is active
+NEIGHBOUR_OFFSETS = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+
+
+def lattice_adjacency(grid_size, periodic=False):
+    """(rows, cols) of the 6-neighbour connections on a grid_size³ lattice."""
+    idx = np.arange(grid_size ** 3).reshape((grid_size,) * 3)
+    rows, cols = [], []
+    for offset in NEIGHBOUR_OFFSETS:
+        neighbour = np.roll(idx, shift=[-o for o in offset], axis=(0, 1, 2))
+        if periodic:
+            rows.append(idx.ravel())
+            cols.append(neighbour.ravel())
+            continue
+        # Drop the connections that wrapped around a face
+        valid = np.ones(idx.shape, dtype=bool)
+        for axis, o in enumerate(offset):
+            if o == 1:
+                valid[(slice(None),) * axis + (-1,)] = False
+            elif o == -1:
+                valid[(slice(None),) * axis + (0,)] = False
+        rows.append(idx[valid])
+        cols.append(neighbour[valid])
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def local_weights(grid_size, spectral_radius=0.9, periodic=False, seed=None, dtype=np.float32):
+    """Random neighbour-only recurrent weights as a CSR matrix.
+
+    Rows are scaled so the largest absolute row sum equals spectral_radius,
+    which bounds the true spectral radius (Gershgorin) without an eigensolve.
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = lattice_adjacency(grid_size, periodic)
+    values = rng.uniform(-1, 1, len(rows))
+    n = grid_size ** 3
+    weights = sparse.csr_matrix((values, (rows, cols)), shape=(n, n))
+    row_sums = np.asarray(abs(weights).sum(axis=1)).ravel()
+    weights.data *= spectral_radius / row_sums.max()
+    return weights.astype(dtype)
+
+
+class Reservoir:
+    """Leaky-integrator echo-state reservoir: x <- (1 - a) x + a tanh(W x + s u)."""
+
+    def __init__(self, grid_size, leak=0.3, spectral_radius=0.9, input_scale=0.5,
+                 periodic=False, seed=None, dtype=np.float32, activity_threshold=None,
+                 activity_block=ACTIVITY_BLOCK):
+        self.grid_size = grid_size
+        self.num_nodes = grid_size ** 3
+        self.leak = leak
+        self.input_scale = input_scale
+        self.weights = local_weights(grid_size, spectral_radius, periodic, seed, dtype)
+        self.state = np.zeros(self.num_nodes, dtype=dtype)
+        self._drive = np.empty(self.num_nodes, dtype=dtype)
+
+        # A (G, G) input grid is injected along z: node (i, j, k) receives u[i, j]
+        self._grid_index = np.repeat(np.arange(grid_size ** 2), grid_size)
+
+        # With an activity threshold, step() only updates blocks that are active
+        # (state or input above it) or next to one; the rest stay as they are.
+        # Call reset() after editing the state from outside.
+        self.activity = None
+        if activity_threshold is not None:
+            self.activity = ActivityMask(grid_size, activity_block, activity_threshold)
+        self._block_max = None  # Per-block max |state|, kept up to date by the active steps
+        self._active_key = None
+        self._full_steps = 0
+
+    def reset(self):
+        self.state.fill(0)
+        self._block_max = None
+
+    def inject(self, inputs):
+        """Per-node input from a (G, G) grid or an (N,) vector."""
+        inputs = np.asarray(inputs)
+        if inputs.shape == (self.grid_size, self.grid_size):
+            return inputs.ravel()[self._grid_index]
+        return inputs
+
+    def step(self, inputs=None):
+        """Advance one step in place and return the state."""
+        if self.activity is not None:
+            return self._step_active(inputs)
+        return self._step_all(inputs)
+
+    def _step_all(self, inputs):
+        drive = self._drive
+        drive[:] = self.weights @ self.state
+        if inputs is not None:
+            drive += self.input_scale * self.inject(inputs)
+        np.tanh(drive, out=drive)
+        self.state *= 1 - self.leak
+        drive *= self.leak
+        self.state += drive
+        return self.state
+
+    def _step_active(self, inputs):
+        """step() restricted to the rows of active blocks and their neighbours."""
+        activity = self.activity
+        if self._block_max is None:
+            self._block_max = block_max(self.state, self.grid_size, activity.block).ravel()
+        blocks = (self._block_max > activity.threshold).reshape(activity.shape)
+
+        grid_input = inputs is not None and np.shape(inputs) == (self.grid_size, self.grid_size)
+        if grid_input:
+            # Activity of a (G, G) grid is found on the grid itself, then spread along z
+            inputs = np.asarray(inputs)
+            cells = np.abs(inputs)
+            starts = np.arange(0, self.grid_size, activity.block)
+            for axis in range(2):
+                cells = np.maximum.reduceat(cells, starts, axis=axis)
+            blocks |= (cells > activity.threshold)[:, :, None]
+        elif inputs is not None:
+            inputs = np.asarray(inputs)
+            blocks |= activity.active(inputs)
+        blocks = dilate(blocks)
+        if not blocks.any():
+            return self.state  # Quiet state and input: nothing moves
+        if blocks.all():
+            # Everything is moving: take the plain step, and only re-measure the
+            # block magnitudes every few steps (until then they count as active)
+            self._step_all(inputs)
+            self._full_steps += 1
+            if self._full_steps % FULL_CHECK_INTERVAL:
+                self._block_max.fill(np.inf)
+            else:
+                self._block_max = None
+            return self.state
+
+        key = blocks.tobytes()
+        if key != self._active_key:
+            # Rows grouped by block, with the matching weight rows; rebuilt only
+            # when the active set changes
+            rows = np.flatnonzero(activity.nodes(blocks))
+            rows = rows[np.argsort(activity.block_index[rows], kind="stable")]
+            owners = activity.block_index[rows]
+            self._active_rows = rows
+            self._active_starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+            self._active_blocks = owners[self._active_starts]
+            self._active_weights = self.weights[rows]
+            self._active_key = key
+        rows = self._active_rows
+
+        drive = self._active_weights @ self.state
+        if grid_input:
+            drive += self.input_scale * inputs.ravel()[self._grid_index[rows]]
+        elif inputs is not None:
+            drive += self.input_scale * inputs[rows]
+        np.tanh(drive, out=drive)
+        drive *= self.leak
+        updated = self.state[rows]
+        updated *= 1 - self.leak
+        updated += drive
+        self.state[rows] = updated
+
+        # Refresh the per-block magnitudes of the blocks just stepped
+        self._block_max[self._active_blocks] = np.maximum.reduceat(np.abs(updated), self._active_starts)
+        return self.state
+
+    def run(self, inputs, out=None):
+        """Step once per input (a (T, G, G) or (T, N) stack) and return the (T, N) states."""
+        if out is None:
+            out = np.empty((len(inputs), self.num_nodes), dtype=self.state.dtype)
+        for t, step_input in enumerate(inputs):
+            out[t] = self.step(step_input)
+        return out
+
+    def settle(self, inputs, steps=5):
+        """Drive a batch of independent copies, each from a zero state, with constant inputs.
+
+        `inputs` is a (B, N) stack; the B copies are stepped together as one
+        sparse-dense product per step and their (B, N) final states returned.
+        The reservoir's own state is left untouched.
+        """
+        drive_in = self.input_scale * np.asarray(inputs, dtype=self.state.dtype).T
+        states = np.zeros_like(drive_in)
+        for _ in range(steps):
+            drive = self.weights @ states
+            drive += drive_in
+            np.tanh(drive, out=drive)
+            states *= 1 - self.leak
+            drive *= self.leak
+            states += drive
+        return states.T
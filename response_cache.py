@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+# In-process response cache for the inference service. Entries expire after a
+# TTL and the cache is bounded with least-recently-used eviction. Concurrent
+# requests for a key that is being computed share that one computation
+# (single flight) instead of each starting their own.
+
+MAX_ENTRIES = 4096
+TTL = 300.0  # Seconds
+
+
+class ResponseCache:
+    """TTL + LRU cache of computed responses with single-flight coalescing."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expiry time, value)
+        self._pending = {}  # key -> future of the computation in flight
+        self._generation = 0  # Bumped by every invalidation
+        self.hits = self.misses = self.coalesced = self.evictions = self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= self.clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, value):
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key, compute):
+        """Cached value for key, or the result of `await compute()` shared by all concurrent callers."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # This caller itself was cancelled
+                # The leading caller was cancelled; compute (or join a new leader) instead
+                return await self.get_or_compute(key, compute)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        generation = self._generation
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            # Cancelling this caller must not fail the followers; they retry instead
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        else:
+            # A result computed across an invalidation may already be stale
+            if generation == self._generation:
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._pending.pop(key, None)
+
+    def invalidate(self, key=None, predicate=None):
+        """Drop `key` and every entry for which predicate(key, value) is true; returns the count."""
+        self._generation += 1
+        stale = [k for k, (_, v) in self._entries.items()
+                 if k == key or (predicate is not None and predicate(k, v))]
+        for k in stale:
+            del self._entries[k]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def metrics(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,50 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Deterministic response -> wave memory encoding. The response text is hashed
+# into the seed of a NumPy generator and the whole (G, G, G) pattern is drawn in
+# one vectorized call, so the same answer always produces the same pattern, in
+# every run and every process. Patterns are kept in a bounded LRU cache, which
+# makes repeated answers free.
+
+MAX_PATTERNS = 256
+
+
+def response_seed(text):
+    """Stable 64-bit seed for a response (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+
+
+def encode_response(text, grid_size):
+    """Uniform [-1, 1) pattern of shape (G, G, G) determined by the response text."""
+    rng = np.random.default_rng(response_seed(text))
+    return rng.uniform(-1, 1, (grid_size,) * 3)
+
+
+class ResponseEncoder:
+    """encode_response with a least-recently-used cache of the patterns."""
+
+    def __init__(self, grid_size, max_patterns=MAX_PATTERNS):
+        self.grid_size = grid_size
+        self.max_patterns = max_patterns
+        self._patterns = OrderedDict()
+
+    def encode(self, text):
+        """Cached pattern for a response (read-only; scale it into a separate array)."""
+        pattern = self._patterns.get(text)
+        if pattern is not None:
+            self._patterns.move_to_end(text)
+            return pattern
+        pattern = encode_response(text, self.grid_size)
+        pattern.flags.writeable = False
+        self._patterns[text] = pattern
+        if len(self._patterns) > self.max_patterns:
+            self._patterns.popitem(last=False)
+        return pattern
+
+    def encode_into(self, text, out, scale=1.0):
+        """Write the pattern times `scale` into `out` (e.g. the simulator's wave memory)."""
+        np.multiply(self.encode(text), scale, out=out)
+        return out
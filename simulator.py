@@ -0,0 +1,126 @@
+import argparse
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from wave_field import make_lattice, WaveField, MemoryField
+
+# Headless simulation core. Nothing here touches pygame, so wave states can be
+# generated on servers with no display as fast as the CPU allows; the pygame
+# scripts (WaveSim.py, ws.py, wave_Train.py) are optional front ends on top.
+
+TIME_STEP = 0.02  # Simulation time advanced per step (one rendered frame)
+
+
+class Simulator(ABC):
+    """Owns sim_time and the lattice; subclasses decide how the field is computed."""
+
+    def __init__(self, grid_size=18, spacing=30, dt=TIME_STEP):
+        self.grid_size = grid_size
+        self.spacing = spacing
+        self.dt = dt
+        self.sim_time = 0.0
+        self.points = make_lattice(grid_size, spacing)
+
+    @property
+    def num_points(self):
+        return len(self.points)
+
+    def step(self, n=1):
+        """Advance the simulation by n timesteps."""
+        self.sim_time += self.dt * n
+        return self.sim_time
+
+    def field(self):
+        """Wave intensity at every point for the current sim_time (reused buffer)."""
+        return self._compute(self.sim_time)
+
+    def sample(self, steps, out=None):
+        """Step `steps` times and return the (steps, N) field after each step."""
+        times = self.sim_time + self.dt * np.arange(1, steps + 1)
+        out = self._compute_many(times, out)
+        self.sim_time = float(times[-1]) if steps else self.sim_time
+        return out
+
+    @abstractmethod
+    def _compute(self, sim_time):
+        """Field at one time, as an (N,) array."""
+
+    @abstractmethod
+    def _compute_many(self, times, out):
+        """(T, N) fields at several times, written into `out` when it is given."""
+
+
+class WaveSimulator(Simulator):
+    """Sinusoidal waves radiating from an origin, with optional external input grid."""
+
+    def __init__(self, grid_size=18, spacing=30, frequencies=(0, 0, 0),
+                 origin=(0, 0, 0), external_input=None, dt=TIME_STEP):
+        super().__init__(grid_size, spacing, dt)
+        self.frequencies = list(frequencies)
+        self.external_input = external_input
+        self.wave_field = WaveField(self.points, origin=origin, grid_size=grid_size)
+
+    def set_frequency(self, index, freq):
+        """Set one of the driving frequencies."""
+        self.frequencies[index] = freq
+
+    def set_frequencies(self, frequencies):
+        """Replace all driving frequencies."""
+        self.frequencies = list(frequencies)
+
+    def set_origin(self, origin):
+        """Move the wave origin; only recomputes distances when it actually changes."""
+        if tuple(origin) != self.wave_field.origin:
+            self.wave_field.set_origin(origin)
+
+    def _compute(self, sim_time):
+        return self.wave_field.compute(sim_time, self.frequencies, self.external_input)
+
+    def _compute_many(self, times, out):
+        return self.wave_field.compute_many(times, self.frequencies, self.external_input, out=out)
+
+
+class MemorySimulator(Simulator):
+    """A stored (G, G, G) amplitude pattern modulated by sin(2*pi*t)."""
+
+    def __init__(self, grid_size=18, spacing=30, dt=TIME_STEP):
+        super().__init__(grid_size, spacing, dt)
+        self.wave_memory = np.zeros((grid_size, grid_size, grid_size))
+        self.memory_field = MemoryField(self.points, grid_size)
+
+    def set_memory(self, pattern):
+        """Copy a new pattern into the wave memory."""
+        self.wave_memory[...] = pattern
+
+    def _compute(self, sim_time):
+        return self.memory_field.compute(sim_time, self.wave_memory)
+
+    def _compute_many(self, times, out):
+        return self.memory_field.compute_many(times, self.wave_memory, out=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the wave simulator headlessly.")
+    parser.add_argument("--grid-size", type=int, default=18)
+    parser.add_argument("--spacing", type=float, default=30)
+    parser.add_argument("--freqs", type=float, nargs="+", default=[0, 0, 0])
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--dt", type=float, default=TIME_STEP)
+    parser.add_argument("--out", help="Save the (steps, N) float32 field to this .npy file")
+    args = parser.parse_args()
+
+    sim = WaveSimulator(args.grid_size, args.spacing, args.freqs, dt=args.dt)
+    start = time.perf_counter()
+    states = sim.sample(args.steps)
+    elapsed = time.perf_counter() - start
+    print(f"{args.steps} steps of {sim.num_points} points in {elapsed:.3f}s "
+          f"({args.steps / max(elapsed, 1e-9):.0f} steps/s)")
+
+    if args.out:
+        np.save(args.out, states)
+
+
+if __name__ == "__main__":
+    main()
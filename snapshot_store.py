@@ -0,0 +1,212 @@
+import os
+import queue
+import struct
+import threading
+
+import numpy as np
+
+# Binary snapshot store replacing the old "Point: (x, y, z), Intensity: ..." text
+# dump. Layout of a .snap file:
+#
+#   header   magic, version and point count (HEADER_SIZE bytes)
+#   points   (N, 3) float32 lattice coordinates, written once
+#   records  one per snapshot: float64 sim_time followed by N float32 intensities
+#
+# Records are fixed size, so the number of snapshots follows from the file size
+# and any snapshot can be read straight out of a memory map.
+
+MAGIC = b"WAVESNAP"
+VERSION = 1
+HEADER = struct.Struct("<8sIQ")
+HEADER_SIZE = 32
+
+
+def record_dtype(num_points):
+    """Structured dtype of one snapshot record."""
+    return np.dtype([("time", "<f8"), ("intensity", "<f4", (num_points,))])
+
+
+class SnapshotWriter:
+    """Appends snapshots of a fixed lattice to a .snap file."""
+
+    def __init__(self, filename, points):
+        self.filename = filename
+        self.points = np.asarray(points, dtype="<f4").reshape(-1, 3)
+        self.num_points = len(self.points)
+        self.dtype = record_dtype(self.num_points)
+        self.count = 0
+        self._record = np.zeros(1, dtype=self.dtype)
+
+        # Start a fresh file: header followed by the coordinates
+        self._file = open(filename, "wb")
+        header = HEADER.pack(MAGIC, VERSION, self.num_points)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+        self._file.write(self.points.tobytes())
+
+    def write(self, sim_time, intensities):
+        """Append one snapshot."""
+        self._record["time"] = sim_time
+        self._record["intensity"] = intensities
+        self._file.write(self._record.tobytes())
+        self.count += 1
+
+    def write_many(self, times, intensities):
+        """Append a batch of snapshots ((T,) times and (T, N) intensities) in one write."""
+        records = np.empty(len(times), dtype=self.dtype)
+        records["time"] = times
+        records["intensity"] = intensities
+        self._file.write(records.tobytes())
+        self.count += len(times)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncSnapshotWriter:
+    """Captures snapshots on the caller's thread and writes them from a background thread.
+
+    capture() only copies the field into a bounded queue. The writer thread
+    drains it in batches; when the disk falls behind and the queue is full,
+    capture() either blocks (block=True) or drops the snapshot and counts it.
+    """
+
+    _STOP = object()
+
+    def __init__(self, filename, points, max_queue=256, batch_size=64, block=False):
+        self._writer = SnapshotWriter(filename, points)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.block = block
+        self.captured = 0
+        self.dropped = 0
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def filename(self):
+        return self._writer.filename
+
+    @property
+    def written(self):
+        """Snapshots that have reached the file so far."""
+        return self._writer.count
+
+    def capture(self, sim_time, intensities):
+        """Queue a copy of the field; returns False if it was dropped."""
+        field = np.array(intensities, dtype="<f4")
+        # Checked here, on the caller's thread, so a bad field fails at the call site
+        if field.shape != (self._writer.num_points,):
+            raise ValueError(f"Expected {self._writer.num_points} intensities, got shape {field.shape}")
+        item = (sim_time, field)
+        try:
+            self._queue.put(item, block=self.block)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.captured += 1
+        return True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._queue.get()
+            # Drain whatever else is already waiting, up to one batch
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch and self.error is None:
+                try:
+                    times = [sim_time for sim_time, _ in batch]
+                    self._writer.write_many(times, np.stack([field for _, field in batch]))
+                    self._writer.flush()
+                except Exception as e:
+                    self.error = e  # Reported by close(); later snapshots are discarded
+
+    def close(self):
+        """Write out everything still queued and close the file."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        self._writer.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SnapshotFile:
+    """Memory-mapped view of a .snap file with random access to any snapshot."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as file:
+            magic, version, num_points = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a snapshot file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} in {filename}")
+
+        self.num_points = num_points
+        self.dtype = record_dtype(num_points)
+        self.points = np.memmap(filename, dtype="<f4", mode="r",
+                                offset=HEADER_SIZE, shape=(num_points, 3))
+
+        # A partially written trailing record (e.g. after a crash) is ignored
+        data_offset = HEADER_SIZE + self.points.nbytes
+        count = (os.path.getsize(filename) - data_offset) // self.dtype.itemsize
+        if count > 0:
+            self.records = np.memmap(filename, dtype=self.dtype, mode="r",
+                                     offset=data_offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    @property
+    def times(self):
+        """(T,) capture times."""
+        return self.records["time"]
+
+    @property
+    def intensities(self):
+        """(T, N) float32 intensities, one row per snapshot."""
+        return self.records["intensity"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        """(time, intensities) of one snapshot."""
+        record = self.records[index]
+        return float(record["time"]), record["intensity"]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+def load_snapshots(filename):
+    """Open a snapshot file for reading."""
+    return SnapshotFile(filename)
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+# SQLite-backed store of taught prompt -> response pairs, replacing the
+# training_data.json file that was rewritten in full after every lesson.
+# Prompts are keyed by their normalized text (the primary key doubles as the
+# lookup index), the database runs in WAL mode so readers never block the
+# writer, and every write is a single atomic upsert, so several processes can
+# learn at once without losing entries. Bulk imports commit in batches.
+
+DB_FILE = "training_data.db"
+BATCH_SIZE = 10000
+START_CONFIDENCE = 0.5
+CONFIDENCE_STEP = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    prompt TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    confidence REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Insert a new prompt, or replace the response and raise the confidence of a known one
+UPSERT = f"""
+INSERT INTO responses (prompt, response, confidence) VALUES (?, ?, {START_CONFIDENCE})
+ON CONFLICT(prompt) DO UPDATE SET
+    response = excluded.response,
+    confidence = MIN(1.0, confidence + {CONFIDENCE_STEP})
+"""
+
+# Imported entries keep their stored confidence (the higher one wins on a clash)
+IMPORT = """
+INSERT INTO responses (prompt, response, confidence) VALUES (?, ?, ?)
+ON CONFLICT(prompt) DO UPDATE SET
+    response = excluded.response,
+    confidence = MAX(confidence, excluded.confidence)
+"""
+
+
+def normalize(text):
+    """Lookup key of a prompt: lowercased with whitespace collapsed."""
+    return " ".join(text.lower().split())
+
+
+class TrainingStore:
+    """Prompt -> (response, confidence) pairs in a WAL-mode SQLite database."""
+
+    def __init__(self, path=DB_FILE, timeout=30.0):
+        self.path = path
+        # Autocommit mode: writes open their own BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+
+    def get(self, text):
+        """{"response", "confidence"} for a prompt, or None if it was never taught."""
+        with self._lock:
+            row = self._conn.execute("SELECT response, confidence FROM responses WHERE prompt = ?",
+                                     (normalize(text),)).fetchone()
+        if row is None:
+            return None
+        return {"response": row[0], "confidence": row[1]}
+
+    def __contains__(self, text):
+        return self.get(text) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def data_version(self):
+        """Counter that changes whenever another connection commits to the database."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def items(self):
+        """(prompt, response, confidence) rows of every taught prompt."""
+        with self._lock:
+            return self._conn.execute("SELECT prompt, response, confidence FROM responses").fetchall()
+
+    def learn(self, text, response):
+        """Teach or reinforce one prompt; returns its new confidence."""
+        key = normalize(text)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(UPSERT, (key, response))
+                confidence = self._conn.execute("SELECT confidence FROM responses WHERE prompt = ?",
+                                                (key,)).fetchone()[0]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return confidence
+
+    def learn_many(self, pairs, batch_size=BATCH_SIZE):
+        """Teach (prompt, response) pairs, committing once per batch; returns the count."""
+        return self._write_batches(UPSERT, ((normalize(text), response) for text, response in pairs),
+                                   batch_size)
+
+    def import_entries(self, entries, batch_size=BATCH_SIZE):
+        """Import a {prompt: {"response", "confidence"}} mapping (the old JSON layout)."""
+        rows = ((normalize(text), entry["response"], entry.get("confidence", START_CONFIDENCE))
+                for text, entry in entries.items())
+        return self._write_batches(IMPORT, rows, batch_size)
+
+    def import_json(self, path, batch_size=BATCH_SIZE):
+        """Import a training_data.json file; returns the number of entries."""
+        with open(path) as file:
+            return self.import_entries(json.load(file), batch_size)
+
+    def _write_batches(self, sql, rows, batch_size):
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                count += self._commit_batch(sql, batch)
+                batch = []
+        if batch:
+            count += self._commit_batch(sql, batch)
+        return count
+
+    def _commit_batch(self, sql, batch):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(sql, batch)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(batch)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_store(path=DB_FILE, legacy_json=None):
+    """Open the store, importing a legacy JSON file the first time it is empty."""
+    store = TrainingStore(path)
+    if legacy_json and os.path.exists(legacy_json) and len(store) == 0:
+        try:
+            count = store.import_json(legacy_json)
+            print(f"Imported {count} entries from {legacy_json}")
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            print(f"Could not import {legacy_json}: {e}")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the training database.")
+    parser.add_argument("--db", default=DB_FILE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = commands.add_parser("import", help="Import a training_data.json file")
+    import_cmd.add_argument("json_file")
+    import_cmd.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    commands.add_parser("info", help="Show the number of taught prompts")
+    args = parser.parse_args()
+
+    with TrainingStore(args.db) as store:
+        if args.command == "import":
+            count = store.import_json(args.json_file, args.batch_size)
+            print(f"Imported {count} entries into {args.db}")
+        print(f"{len(store)} prompts in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,13 @@
 import pygame
-import math
-import numpy as np
-import json
-
-# Pygame Setup
-pygame.init()
+from camera import Camera
+from renderer import PointRenderer, brightness_colors
+from response_encoder import ResponseEncoder
+from simulator import MemorySimulator
+from lookup_index import MIN_SIMILARITY, NgramIndex, lookup_response
+from training_store import normalize, open_store
+
+# Window size (the pygame window itself is only opened when run as a script)
 WIDTH, HEIGHT = 800, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("3D Wave Propagation Simulator with Learning")
-clock = pygame.time.Clock()
 
 # Physical Constants
 GRID_SIZE = 18
@@ -16,80 +15,54 @@ SPACING = 30
 FOV = 600
 DEFAULT_FREQS = [0, 0, 0]
 
-# Camera Position
-camera_x, camera_y, camera_z = 0, 0, -500
-camera_angle_x, camera_angle_y = 0, 0
+# Camera position, angles and projection
+camera = Camera(0, 0, -500, fov=FOV, width=WIDTH, height=HEIGHT)
 
-# Training Data Storage
+# Training Data Storage (SQLite; an old training_data.json is imported on first run)
+TRAINING_DB = "training_data.db"
 TRAINING_FILE = "training_data.json"
 
-def load_training_data():
-    """Load training data from a JSON file."""
-    try:
-        with open(TRAINING_FILE, 'r') as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
-
-def save_training_data(data):
-    """Save updated training data to JSON."""
-    with open(TRAINING_FILE, 'w') as file:
-        json.dump(data, file, indent=4)
-
-training_data = load_training_data()
-wave_memory = np.zeros((GRID_SIZE, GRID_SIZE, GRID_SIZE))
-
-# 3D Points for Cube
-cube_points = [((x - GRID_SIZE // 2) * SPACING, 
-                (y - GRID_SIZE // 2) * SPACING, 
-                (z - GRID_SIZE // 2) * SPACING)
-                for x in range(GRID_SIZE)
-                for y in range(GRID_SIZE)
-                for z in range(GRID_SIZE)]
-
-def project_3d_to_2d(x, y, z):
-    """Project 3D points to 2D screen space."""
-    scale = FOV / (FOV + z - camera_z)
-    px = int(WIDTH // 2 + (x - camera_x) * scale)
-    py = int(HEIGHT // 2 - (y - camera_y) * scale)
-    return px, py
-
-def get_wave_intensity(x, y, z, sim_time):
-    """Calculate wave intensity at a given point."""
-    return wave_memory[x % GRID_SIZE, y % GRID_SIZE, z % GRID_SIZE] * np.sin(2 * np.pi * sim_time)
+training_store = open_store(TRAINING_DB, legacy_json=TRAINING_FILE)
+
+# Fuzzy lookup over the taught prompts, for inputs with no exact match
+lookup_index = NgramIndex(prompt for prompt, _, _ in training_store.items())
+
+# Headless simulator holding the wave memory
+sim = MemorySimulator(GRID_SIZE, SPACING)
+wave_memory = sim.wave_memory
+
+# Deterministic, cached response -> wave memory patterns
+encoder = ResponseEncoder(GRID_SIZE)
+
+# 3D Points for Cube, held as one (N, 3) array
+cube_points = sim.points
+
+# Batched dot renderer, draws every point of a frame at once
+renderer = PointRenderer(WIDTH, HEIGHT, radius=3)
+
+def get_wave_intensities():
+    """Calculate wave intensity at every point at the current sim_time."""
+    return sim.field()
 
 def update_waves(input_text):
     """Update wave memory based on user input and learning model."""
-    global training_data
-
     input_text = input_text.lower().strip()
-    if input_text in training_data:
-        response_data = training_data[input_text]
-        response = response_data["response"]
-        confidence = response_data["confidence"]
+    found = lookup_response(training_store, lookup_index, input_text, MIN_SIMILARITY)
+    if found is not None:
+        response, confidence, _ = found
 
         print(f"Response: {response} (Confidence: {confidence:.2f})")
 
         # Encode response into the wave system (stronger response if confidence is high)
-        for x in range(GRID_SIZE):
-            for y in range(GRID_SIZE):
-                for z in range(GRID_SIZE):
-                    wave_memory[x, y, z] = np.random.uniform(-1, 1) * confidence
+        encoder.encode_into(response, wave_memory, confidence)
     else:
         print("I don't know that yet! Teach me?")
         awaiting_feedback.append(input_text)  # Store for learning
 
 def reinforce_learning(input_text, response_text):
     """Update or reinforce the model with user feedback."""
-    global training_data
-
-    if input_text in training_data:
-        training_data[input_text]["response"] = response_text
-        training_data[input_text]["confidence"] = min(1.0, training_data[input_text]["confidence"] + 0.1)  # Increase confidence
-    else:
-        training_data[input_text] = {"response": response_text, "confidence": 0.5}
-
-    save_training_data(training_data)
+    training_store.learn(input_text, response_text)
+    lookup_index.add(normalize(input_text))
     print(f"Learned: '{input_text}' → '{response_text}'")
 
 # Input Handling
@@ -98,59 +71,61 @@ in_input_mode = False
 awaiting_feedback = []
 user_input = ""
 
-sim_time = 0
-while running:
-    clock.tick(60)
-    screen.fill((0, 0, 0))
-
-    # Event Handling
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_BACKQUOTE:
-                in_input_mode = True
-                user_input = ""
-            elif in_input_mode:
-                if event.key == pygame.K_RETURN:
-                    if awaiting_feedback:
-                        reinforce_learning(awaiting_feedback.pop(0), user_input)  # Train the model
+if __name__ == "__main__":
+    # Pygame Setup
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("3D Wave Propagation Simulator with Learning")
+    clock = pygame.time.Clock()
+
+    while running:
+        clock.tick(60)
+
+        # Event Handling
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_BACKQUOTE:
+                    in_input_mode = True
+                    user_input = ""
+                elif in_input_mode:
+                    if event.key == pygame.K_RETURN:
+                        if awaiting_feedback:
+                            reinforce_learning(awaiting_feedback.pop(0), user_input)  # Train the model
+                        else:
+                            update_waves(user_input)
+                        in_input_mode = False
+                    elif event.key == pygame.K_BACKSPACE:
+                        user_input = user_input[:-1]
                     else:
-                        update_waves(user_input)
-                    in_input_mode = False
-                elif event.key == pygame.K_BACKSPACE:
-                    user_input = user_input[:-1]
-                else:
-                    user_input += event.unicode
-
-    # Camera Movement
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_LEFT]: camera_angle_y -= 0.05
-    if keys[pygame.K_RIGHT]: camera_angle_y += 0.05
-    if keys[pygame.K_UP]: camera_angle_x -= 0.05
-    if keys[pygame.K_DOWN]: camera_angle_x += 0.05
-    if keys[pygame.K_w]: camera_z += 20
-    if keys[pygame.K_s]: camera_z -= 20
-    if keys[pygame.K_a]: camera_x -= 20
-    if keys[pygame.K_d]: camera_x += 20
-
-    sim_time += 0.02
-
-    # Render 3D Points
-    for x, y, z in cube_points:
-        px, py = project_3d_to_2d(x, y, z)
-        wave_intensity = get_wave_intensity(x, y, z, sim_time)
-        brightness = int(127 + 128 * wave_intensity)
-        brightness = max(0, min(255, brightness))
-        color = (brightness, brightness, 255)
-        pygame.draw.circle(screen, color, (px, py), 3)
-
-    # Display User Input
-    if in_input_mode:
-        font = pygame.font.SysFont('Arial', 24)
-        input_text = font.render(f"Enter text: {user_input}", True, (255, 255, 255))
-        screen.blit(input_text, (10, HEIGHT - 40))
-
-    pygame.display.flip()
-
-pygame.quit()
+                        user_input += event.unicode
+
+        # Camera Movement
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_LEFT]: camera.angle_y -= 0.05
+        if keys[pygame.K_RIGHT]: camera.angle_y += 0.05
+        if keys[pygame.K_UP]: camera.angle_x -= 0.05
+        if keys[pygame.K_DOWN]: camera.angle_x += 0.05
+        if keys[pygame.K_w]: camera.z += 20
+        if keys[pygame.K_s]: camera.z -= 20
+        if keys[pygame.K_a]: camera.x -= 20
+        if keys[pygame.K_d]: camera.x += 20
+
+        sim.step()
+
+        # Render 3D Points
+        wave_intensity = get_wave_intensities()
+        screen_points, depth, visible = camera.project(cube_points, margin=3)
+        renderer.draw(screen, screen_points, depth, brightness_colors(wave_intensity), visible)
+
+        # Display User Input
+        if in_input_mode:
+            font = pygame.font.SysFont('Arial', 24)
+            input_text = font.render(f"Enter text: {user_input}", True, (255, 255, 255))
+            screen.blit(input_text, (10, HEIGHT - 40))
+
+        pygame.display.flip()
+
+    pygame.quit()
+    training_store.close()
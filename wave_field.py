@@ -0,0 +1,138 @@
+import numpy as np
+
+# Shared wave field engine: the lattice lives in one (N, 3) array and the
+# summed sinusoids for every point and every frequency are computed at once.
+
+
+def make_lattice(grid_size, spacing):
+    """Build the cube lattice as an (N, 3) float array in cube_points order."""
+    axis = (np.arange(grid_size) - grid_size // 2) * spacing
+    x, y, z = np.meshgrid(axis, axis, axis, indexing="ij")
+    return np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1).astype(np.float64)
+
+
+def lattice_indices(points, grid_size):
+    """Integer grid indices (coordinate % grid_size) used to look up 2D/3D input grids."""
+    return np.mod(points.astype(np.int64), grid_size)
+
+
+class WaveField:
+    """Summed sinusoids over the whole lattice, written into a reusable buffer.
+
+    For every frequency f the point at distance d from the origin contributes
+    sin(2*pi*f*(t - d / (1 + 0.01*f))), the formula get_wave_intensity applied per point.
+    """
+
+    def __init__(self, points, origin=(0, 0, 0), grid_size=None):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.grid_size = grid_size
+        self.distances = np.empty(len(self.points))
+        self.intensity = np.empty(len(self.points))
+        self._scratch = np.empty(len(self.points))
+        self._input_index = None
+        self._freqs = None
+        self._delays = None
+        self.set_origin(origin)
+
+    def set_origin(self, origin):
+        """Move the wave origin (e.g. the camera) and refresh the distance table."""
+        self.origin = tuple(origin)
+        diff = self.points - np.asarray(self.origin, dtype=np.float64)
+        np.sqrt(np.einsum("ij,ij->i", diff, diff), out=self.distances)
+        self._freqs = None  # Delays depend on the distances
+
+    def _delay_table(self, frequencies):
+        """Per-frequency distance delays (F, N), cached until the frequencies change."""
+        freqs = tuple(float(f) for f in frequencies)
+        if freqs != self._freqs:
+            f = np.asarray(freqs)[:, None]
+            self._delays = self.distances[None, :] / (1 + f * 0.01)
+            self._freqs = freqs
+        return self._delays
+
+    def compute(self, sim_time, frequencies, external_input=None, out=None):
+        """Wave intensity for every point at sim_time, optionally plus 0.5 * external input."""
+        if out is None:
+            out = self.intensity
+        out.fill(0)
+        delays = self._delay_table(frequencies)
+        tmp = self._scratch
+        for freq, delay in zip(self._freqs, delays):
+            if freq == 0:
+                continue  # sin(0) contributes nothing
+            np.subtract(sim_time, delay, out=tmp)
+            tmp *= 2 * np.pi * freq
+            np.sin(tmp, out=tmp)
+            out += tmp
+
+        # Inject external input (audio/video) the same way ws.py indexes it
+        if external_input is not None:
+            out += self.sample_input(external_input) * 0.5
+        return out
+
+    def compute_many(self, times, frequencies, external_input=None, out=None, chunk=64):
+        """Wave intensity for every point at each of `times`, as a (T, N) array.
+
+        external_input may be one (G, G) grid for all timesteps or a (T, G, G)
+        stack with one grid per timestep. Timesteps are broadcast against the
+        lattice in chunks so the scratch memory stays bounded however many
+        steps are requested.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if out is None:
+            out = np.empty((len(times), len(self.points)), dtype=np.float32)
+        delays = self._delay_table(frequencies)
+        per_step = external_input is not None and np.ndim(external_input) == 3
+        offset = 0.0
+        if external_input is not None and not per_step:
+            offset = self.sample_input(external_input) * 0.5
+        for start in range(0, len(times), chunk):
+            t = times[start:start + chunk, None]
+            block = np.zeros((len(t), len(self.points)))
+            for freq, delay in zip(self._freqs, delays):
+                if freq == 0:
+                    continue
+                block += np.sin(2 * np.pi * freq * (t - delay[None, :]))
+            if per_step:
+                block += self.sample_input(external_input[start:start + len(t)]) * 0.5
+            else:
+                block += offset
+            out[start:start + len(t)] = block
+        return out
+
+    def sample_input(self, external_input):
+        """Gather a (G, G) input grid (or a stack of them) onto the lattice via [x % G, y % G]."""
+        if self._input_index is None:
+            grid_size = self.grid_size or external_input.shape[-1]
+            idx = lattice_indices(self.points, grid_size)
+            self._input_index = (idx[:, 0], idx[:, 1])
+        return external_input[(Ellipsis,) + self._input_index]
+
+
+class MemoryField:
+    """Stored amplitude pattern modulated in time: wave_memory * sin(2*pi*t)."""
+
+    def __init__(self, points, grid_size):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.grid_size = grid_size
+        idx = lattice_indices(self.points, grid_size)
+        self._flat_index = np.ravel_multi_index((idx[:, 0], idx[:, 1], idx[:, 2]),
+                                                (grid_size,) * 3)
+        self.intensity = np.empty(len(self.points))
+
+    def compute(self, sim_time, wave_memory, out=None):
+        """Wave intensity for every point given the current (G, G, G) memory."""
+        if out is None:
+            out = self.intensity
+        np.take(wave_memory.ravel(), self._flat_index, out=out)
+        out *= np.sin(2 * np.pi * sim_time)
+        return out
+
+    def compute_many(self, times, wave_memory, out=None):
+        """Wave intensity for every point at each of `times`, as a (T, N) array."""
+        times = np.asarray(times, dtype=np.float64)
+        if out is None:
+            out = np.empty((len(times), len(self.points)), dtype=np.float32)
+        pattern = wave_memory.ravel()[self._flat_index]
+        np.multiply(np.sin(2 * np.pi * times)[:, None], pattern[None, :], out=out, casting="unsafe")
+        return out
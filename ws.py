@@ -1,206 +1,252 @@
+import argparse
 import pygame
-import math
 import numpy as np
 import time  # Import the time module for time-related functions
-import librosa
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-
-# Pygame Setup
-pygame.init()
+from activity import ACTIVITY_THRESHOLD, ActivityMask
+from camera import Camera
+from profiler import Profiler
+from readout import READOUT_DIR, Readout
+from reservoir import Reservoir
+from renderer import PointRenderer, brightness_colors
+from simulator import WaveSimulator
+
+# Window size (the pygame window itself is only opened when run as a script)
 WIDTH, HEIGHT = 800, 800
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("3D Wave Propagation Simulator")
-clock = pygame.time.Clock()
 
 # Physical Constants
 GRID_SIZE = 10  # Grid size (increased for higher resolution)
 SPACING = 30  # Spacing between dots
 FOV = 600
 DEFAULT_FREQS = [0, 0, 0]  # Default frequencies
+AUDIO_FILE = "audio.wav"
+USE_AUDIO_CACHE = True  # Load pre-encoded grids from the audio cache instead of streaming
 
-# Camera Position
-camera_x, camera_y, camera_z = 0, 0, -500
-camera_angle_x, camera_angle_y = 0, 0
-
-# 3D Points for Cube
-cube_points = []
-for x in range(GRID_SIZE):
-    for y in range(GRID_SIZE):
-        for z in range(GRID_SIZE):
-            cube_points.append(((x - GRID_SIZE // 2) * SPACING, 
-                                (y - GRID_SIZE // 2) * SPACING, 
-                                (z - GRID_SIZE // 2) * SPACING))
-
-def project_3d_to_2d(x, y, z):
-    """ Converts 3D coordinates to 2D for rendering. """
-    scale = FOV / (FOV + z - camera_z)
-    px = int(WIDTH // 2 + (x - camera_x) * scale)
-    py = int(HEIGHT // 2 - (y - camera_y) * scale)
-    return px, py
+# Camera position, angles and projection
+camera = Camera(0, 0, -500, fov=FOV, width=WIDTH, height=HEIGHT)
 
 # Define a wave origin at the center of the grid
 wave_origin = (0, 0, 0)
 
-# Generate wave propagation intensity based on frequency and distance
-def get_wave_intensity(x, y, z, sim_time, frequencies, external_input):
-    """ Compute wave intensity influenced by external input (audio/video). """
-    intensity = 0
-    distance = math.sqrt((x - wave_origin[0])**2 + (y - wave_origin[1])**2 + (z - wave_origin[2])**2)
-    
-    for freq in frequencies:
-        wave = np.sin(2 * np.pi * freq * (sim_time - distance / (1 + freq * 0.01)))
-        intensity += wave
-
-    # Inject external input (audio/video)
-    intensity += external_input[x % GRID_SIZE, y % GRID_SIZE] * 0.5  # Scale appropriately
-    return intensity
-
-# Function to encode audio into a 2D grid pattern
-def encode_audio(audio_file, grid_size):
-    # Load audio and compute spectrogram
-    y, sr = librosa.load(audio_file, sr=22050)
-    S = np.abs(librosa.stft(y, n_fft=grid_size**2))
-    
-    # Normalize and reshape to match the grid
-    S = S / np.max(S)
-    return S.reshape((grid_size, grid_size))
+# Headless simulator driving the wave field
+sim = WaveSimulator(GRID_SIZE, SPACING, DEFAULT_FREQS, origin=wave_origin)
+
+# 3D Points for Cube, held as one (N, 3) array
+cube_points = sim.points
+
+# Batched dot renderer, draws every point of a frame at once
+renderer = PointRenderer(WIDTH, HEIGHT, radius=3)
+
+# Block activity of the reservoir state: regions that did not change are neither redrawn nor
+# sent to the display
+activity = ActivityMask(GRID_SIZE)
+
+# Per-stage timings with an on-screen HUD (F3 toggles; starts on with WAVE_PROFILE=1)
+profiler = Profiler()
+profile_trace_filename = "profile_trace.json"
 
 # Extract features from the wave environment
 def extract_features(grid, sim_time, audio_input):
     """ Flatten the 3D wave states into a feature vector. """
-    return np.array([get_wave_intensity(x, y, z, sim_time, DEFAULT_FREQS, audio_input) for x, y, z in cube_points]).flatten()
-
-# Set up the logistic regression model for readout layer
-clf = LogisticRegression(max_iter=1000)
-
-# Simulation time control
-sim_time = 0  # Renamed the simulation time variable
+    return extract_features_batch([sim_time], audio_input)[0]
+
+def extract_features_batch(times, audio_input):
+    """ Wave states for many timesteps in one vectorized call, as a (samples, points) matrix. """
+    return sim.wave_field.compute_many(times, sim.frequencies, audio_input)
+
+# Liquid-state reservoir over the lattice, driven each step by the wave field
+# (which carries the audio input); its state is what we display and read out.
+# Quiet blocks (silent input, decayed state) are skipped when stepping
+reservoir = Reservoir(GRID_SIZE, seed=0, activity_threshold=ACTIVITY_THRESHOLD)
+RESERVOIR_WORKERS = 1  # > 1 steps the reservoir in slabs across that many processes
+
+# Logistic regression readout layer, fitted by the precompute step and memory-mapped
+# from READOUT_PATH afterwards; audio, sklearn and the parallel reservoir only load when used
+READOUT_PATH = f"{READOUT_DIR}_{GRID_SIZE}"
+NUM_TRAINING_SAMPLES = 100
+
+def open_audio():
+    """ Audio input, one grid per step: memory-mapped from the cache (encoded on first use),
+    or streamed with the spectrogram encoded frame by frame. """
+    if USE_AUDIO_CACHE:
+        from audio_cache import AudioCache
+        return AudioCache().open(AUDIO_FILE, GRID_SIZE)
+    from audio_stream import AudioStream
+    return AudioStream(AUDIO_FILE, GRID_SIZE, loop=True)
+
+def precompute():
+    """ Encode the audio and fit the readout, saving both for memory-mapped loading. """
+    from sklearn.model_selection import train_test_split
+
+    # Training data for the readout layer: reservoir states driven by the audio-based
+    # wave field, one row per timestep
+    audio = open_audio()
+    train_times = sim.sim_time + sim.dt * np.arange(NUM_TRAINING_SAMPLES)
+    wave_states = extract_features_batch(train_times, audio.next_grids(NUM_TRAINING_SAMPLES))
+    audio.close()
+    X_train = Reservoir(GRID_SIZE, seed=0).run(wave_states)
+    y_train = np.random.randint(0, 2, NUM_TRAINING_SAMPLES)  # Random binary labels for simplicity
+
+    # Train a simple logistic regression classifier
+    X_train, X_test, y_train, y_test = train_test_split(X_train, y_train, test_size=0.2)
+    readout = Readout.fit(X_train, y_train)
+    readout.save(READOUT_PATH)
+    return readout
 
 # Initialize variables for input mode
 running = True
 in_input_mode = False
 user_input = ""
 selected_frequency_index = None
+mouse_dragging = False
 
 # Snapshots
 snapshot_start_time = None
 snapshot_counter = 0
 snapshot_interval = 1  # seconds
-snapshot_filename = "cube_snapshots.txt"
-
-# Time control for smooth wave animation
-sim_time = 0
-
-# Training data for the readout layer (audio-based features)
-X_train, y_train = [], []
-
-# Encode some initial audio data for training
-audio_input = encode_audio("audio.wav", GRID_SIZE)
-
-# Generate training data (for this example, using random labels)
-for _ in range(100):  # Generate 100 training samples
-    X_train.append(extract_features(cube_points, sim_time, audio_input))
-    y_train.append(np.random.randint(0, 2))  # Random binary labels for simplicity
-
-# Train a simple logistic regression classifier
-X_train, X_test, y_train, y_test = train_test_split(X_train, y_train, test_size=0.2)
-clf.fit(X_train, y_train)
-
-# Main simulation loop
-while running:
-    clock.tick(15)  # Control loop speed to allow for smoother visuals
-    screen.fill((0, 0, 0))  # Clear screen
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        # Start input mode when the "" key is pressed
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_BACKQUOTE:  # "" key for input mode
-                in_input_mode = True
-                user_input = ""  # Clear the input string
-                selected_frequency_index = None  # Reset frequency index selection
-
-            elif in_input_mode:
-                if selected_frequency_index is None:
-                    # If no frequency index selected, prompt for one
-                    if event.key in [pygame.K_0, pygame.K_1, pygame.K_2]:
-                        selected_frequency_index = int(event.unicode)  # Set the selected frequency index
-                        user_input = ""  # Clear user input for the frequency value
-                elif event.key == pygame.K_RETURN:
-                    # Update the selected frequency when the user presses Enter
-                    try:
-                        new_freq = float(user_input)
-                        DEFAULT_FREQS[selected_frequency_index] = new_freq  # Update the selected frequency
-                    except ValueError:
-                        pass  # If invalid input, just ignore
-                    in_input_mode = False  # Exit input mode
-                elif event.key == pygame.K_BACKSPACE:
-                    user_input = user_input[:-1]  # Delete last character
-                else:
-                    user_input += event.unicode  # Add character to input string
-
-        # Mouse dragging for rotation
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:  # Left mouse button click
-                mouse_dragging = True
-                last_x, last_y = event.pos  # Store the mouse position when dragging starts
-
-        elif event.type == pygame.MOUSEBUTTONUP:
-            if event.button == 1:  # Left mouse button release
-                mouse_dragging = False  # Stop dragging
-
-        elif event.type == pygame.MOUSEMOTION:
-            if mouse_dragging:
-                dx, dy = event.pos[0] - last_x, event.pos[1] - last_y  # Get the change in mouse position
-                camera_angle_y += dx * 0.1  # Rotate around the y-axis (left/right)
-                camera_angle_x += dy * 0.1  # Rotate around the x-axis (up/down)
-                last_x, last_y = event.pos  # Update the last mouse position
-
-    # Camera Controls (keyboard)
-    keys = pygame.key.get_pressed()
-    if keys[pygame.K_w]: camera_z += 20
-    if keys[pygame.K_s]: camera_z -= 20
-    if keys[pygame.K_a]: camera_x -= 20
-    if keys[pygame.K_d]: camera_x += 20
-
-    # Update time for smooth wave animation
-    sim_time += 0.02
-
-    # Draw dots with increased density
-    for point in cube_points:
-        x, y, z = point
-
-        # Rotate point around the x and y axes based on the camera angles
-        rotated_x = x * math.cos(camera_angle_y) - z * math.sin(camera_angle_y)
-        rotated_z = x * math.sin(camera_angle_y) + z * math.cos(camera_angle_y)
-        rotated_y = y * math.cos(camera_angle_x) - rotated_z * math.sin(camera_angle_x)
-        rotated_z = y * math.sin(camera_angle_x) + rotated_z * math.cos(camera_angle_x)
-
-        # Project the rotated 3D point to 2D space
-        px, py = project_3d_to_2d(rotated_x, rotated_y, rotated_z)
-        
-        # Calculate wave intensity based on time and position
-        wave_intensity = get_wave_intensity(x, y, z, sim_time, DEFAULT_FREQS, audio_input)
-        
-        # Map wave intensity to brightness
-        brightness = int(127 + 128 * wave_intensity)
-        
-        # Ensure brightness stays within the valid range [0, 255]
-        brightness = max(0, min(255, brightness))
-        
-        # Color with the adjusted brightness
-        color = (brightness, brightness, 255)
-
-        pygame.draw.circle(screen, color, (px, py), 3)  # Increase the size of dots for more visibility
-
-    # Use the trained classifier to predict
-    if len(X_train) > 0:
-        pred = clf.predict([extract_features(cube_points, sim_time, audio_input)])
+snapshot_filename = "cube_snapshots.snap"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audio-driven liquid-state wave simulator.")
+    parser.add_argument("--precompute", action="store_true",
+                        help="Encode the audio and fit the readout, then exit")
+    args = parser.parse_args()
+    if args.precompute:
+        precompute()
+        print(f"Saved the readout to {READOUT_PATH}")
+        raise SystemExit
+
+    # Load the saved readout; the first run fits it
+    try:
+        readout = Readout.load(READOUT_PATH)
+    except FileNotFoundError:
+        readout = precompute()
+
+    # Worker processes re-import this module, so the pool is only started here
+    if RESERVOIR_WORKERS > 1:
+        from parallel_reservoir import ParallelReservoir
+        reservoir = ParallelReservoir(GRID_SIZE, RESERVOIR_WORKERS, seed=0)
+
+    audio_stream = open_audio()
+
+    # Pygame Setup
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("3D Wave Propagation Simulator")
+    clock = pygame.time.Clock()
+    last_view = None  # Camera pose of the last projection
+    last_overlay = False  # Whether text was drawn over the last frame
+
+    # Main simulation loop
+    while running:
+        clock.tick(15)  # Control loop speed to allow for smoother visuals
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+
+            # Start input mode when the "" key is pressed
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_BACKQUOTE:  # "" key for input mode
+                    in_input_mode = True
+                    user_input = ""  # Clear the input string
+                    selected_frequency_index = None  # Reset frequency index selection
+
+                elif in_input_mode:
+                    if selected_frequency_index is None:
+                        # If no frequency index selected, prompt for one
+                        if event.key in [pygame.K_0, pygame.K_1, pygame.K_2]:
+                            selected_frequency_index = int(event.unicode)  # Set the selected frequency index
+                            user_input = ""  # Clear user input for the frequency value
+                    elif event.key == pygame.K_RETURN:
+                        # Update the selected frequency when the user presses Enter
+                        try:
+                            new_freq = float(user_input)
+                            sim.set_frequency(selected_frequency_index, new_freq)  # Update the selected frequency
+                        except ValueError:
+                            pass  # If invalid input, just ignore
+                        in_input_mode = False  # Exit input mode
+                    elif event.key == pygame.K_BACKSPACE:
+                        user_input = user_input[:-1]  # Delete last character
+                    else:
+                        user_input += event.unicode  # Add character to input string
+
+            # Mouse dragging for rotation
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:  # Left mouse button click
+                    mouse_dragging = True
+                    last_x, last_y = event.pos  # Store the mouse position when dragging starts
+
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:  # Left mouse button release
+                    mouse_dragging = False  # Stop dragging
+
+            elif event.type == pygame.MOUSEMOTION:
+                if mouse_dragging:
+                    dx, dy = event.pos[0] - last_x, event.pos[1] - last_y  # Get the change in mouse position
+                    camera.angle_y += dx * 0.1  # Rotate around the y-axis (left/right)
+                    camera.angle_x += dy * 0.1  # Rotate around the x-axis (up/down)
+                    last_x, last_y = event.pos  # Update the last mouse position
+
+        # Camera Controls (keyboard)
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_w]: camera.z += 20
+        if keys[pygame.K_s]: camera.z -= 20
+        if keys[pygame.K_a]: camera.x -= 20
+        if keys[pygame.K_d]: camera.x += 20
+
+        # Update time for smooth wave animation, feeding in the next audio frame
+        with profiler.span("simulate"):
+            sim.step()
+            sim.external_input = audio_stream.next_grid()
+
+        # Calculate wave intensity for every point based on time and position
+        with profiler.span("field"):
+            wave_intensity = sim.field()
+
+        # Drive the reservoir with this frame's wave field
+        with profiler.span("reservoir"):
+            liquid_state = reservoir.step(wave_intensity)
+
+        # Rotate and project every point at once, culling those behind the camera or off screen;
+        # a still camera keeps the last projection
+        view = (camera.x, camera.y, camera.z, camera.angle_x, camera.angle_y)
+        redraw_all = view != last_view or last_overlay
+        if view != last_view:
+            with profiler.span("project"):
+                screen_points, depth, visible = camera.project(cube_points, margin=3)
+            last_view = view
+
+        # Map reservoir activity to brightness and draw every dot in one batch, nearest on top
+        # (only around the blocks that changed, unless the whole frame is stale)
+        with profiler.span("draw"):
+            changed = activity.nodes(activity.changed(liquid_state))
+            colors = brightness_colors(liquid_state)
+            if redraw_all:
+                renderer.draw(screen, screen_points, depth, colors, visible)
+                dirty = None
+            else:
+                dirty = renderer.update(screen, screen_points, depth, colors, visible, changed)
+
+        # Use the trained readout to predict from the reservoir state for this frame
+        with profiler.span("predict"):
+            pred = readout.predict(liquid_state)
         print("Prediction:", pred)  # Print prediction (for debugging)
 
-    pygame.display.flip()
-
-pygame.quit()
+        profiler.draw_hud(screen)
+        last_overlay = profiler.enabled
+        with profiler.span("flip"):
+            if dirty is None or last_overlay:
+                pygame.display.flip()
+            elif dirty:
+                pygame.display.update(dirty)
+        profiler.frame()
+
+    if profiler.events:
+        count = profiler.export_chrome_trace(profile_trace_filename)
+        print(f"Wrote {count} profiling spans to {profile_trace_filename}")
+    audio_stream.close()
+    if RESERVOIR_WORKERS > 1:
+        reservoir.close()
+    pygame.quit()